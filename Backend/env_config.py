@@ -0,0 +1,18 @@
+"""
+Shared environment loading for the verification/test scripts
+
+Each script used to call load_dotenv() itself, so running several in one
+process reparsed .env once per script. Importing this module parses the
+file exactly once and exposes the values the scripts need; real
+environment variables still take precedence over the file.
+"""
+import os
+from dotenv import load_dotenv
+
+# One parse per process — later imports of this module are free
+load_dotenv()
+
+MONGO_URI = os.environ.get('MONGO_URI', 'mongodb://localhost:27017/therapy_assistant')
+GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
+GROQ_API_KEY = os.environ.get('GROQ_API_KEY')
+OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
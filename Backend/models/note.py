@@ -12,7 +12,9 @@ class Note:
     def _create_indexes(self):
         """Create indexes for better query performance"""
         self.collection.create_index('session_id')
-        self.collection.create_index('client_id')
+        # Compound index serves both the client_id filter and the
+        # created_at sort used by the "recent notes" queries
+        self.collection.create_index([('client_id', 1), ('created_at', -1)])
         self.collection.create_index('therapist_id')
     
     def create_note(self, therapist_id, client_id, session_id, content, note_type='session', 
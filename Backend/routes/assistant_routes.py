@@ -2,7 +2,8 @@
 Assistant Routes
 Handles RAG assistant queries and data indexing
 """
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, Response, current_app
+import json
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from services.rag_assistant import RAGAssistant
 from bson.objectid import ObjectId
@@ -53,6 +54,35 @@ def query_assistant():
         return jsonify({'error': str(e)}), 500
 
 
+@assistant_bp.route('/query/stream', methods=['POST'])
+@jwt_required()
+def query_assistant_stream():
+    """
+    Query the RAG assistant with a streamed (SSE) answer
+    POST /api/assistant/query/stream
+    Body: { "query": "your question here", "n_results": 5 }
+    """
+    try:
+        if not rag_assistant:
+            return jsonify({'error': 'Assistant not initialized'}), 500
+
+        data = request.get_json()
+        query = data.get('query')
+        n_results = data.get('n_results', 5)
+
+        if not query:
+            return jsonify({'error': 'Query is required'}), 400
+
+        def event_stream():
+            for event in rag_assistant.query_assistant_stream(query, n_results=n_results):
+                yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+
+        return Response(event_stream(), mimetype='text/event-stream')
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @assistant_bp.route('/initialize', methods=['POST'])
 @jwt_required()
 def initialize_assistant():
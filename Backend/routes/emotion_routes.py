@@ -324,7 +324,7 @@ def get_suggested_question(session_id):
     Get AI-generated therapeutic question based on current emotion and context
     """
     try:
-        from services.question_assistant import QuestionAssistant
+        from services.question_assistant import get_assistant
         
         current_user_id = get_jwt_identity()
         
@@ -375,8 +375,8 @@ def get_suggested_question(session_id):
             if notes_context:
                 previous_notes = "\n".join(notes_context)
         
-        # Generate question
-        assistant = QuestionAssistant()
+        # Generate question (shared instance keeps the Groq connection warm)
+        assistant = get_assistant()
         result = assistant.generate_question(
             emotion_data=latest_emotion,
             recent_transcript=recent_transcript,
@@ -1,351 +1,355 @@
-from flask import Blueprint, request, jsonify, current_app, send_file
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models.note import Note
-from models.client import Client
-from models.session import Session
-from services.pdf_service import PDFExportService
-import io
-
-notes_bp = Blueprint('notes', __name__)
-
-@notes_bp.route('/', methods=['GET'])
-@jwt_required()
-def get_notes():
-    """Get all notes for the current therapist"""
-    try:
-        current_user_id = get_jwt_identity()
-        note_model = Note(current_app.db)
-        
-        limit = request.args.get('limit', type=int)
-        notes = note_model.find_by_therapist(current_user_id, limit)
-        
-        return jsonify({
-            'notes': [note_model.to_dict(note, populate_refs=True) for note in notes]
-        }), 200
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
-@notes_bp.route('/<note_id>', methods=['GET'])
-@jwt_required()
-def get_note(note_id):
-    """Get a specific note"""
-    try:
-        current_user_id = get_jwt_identity()
-        note_model = Note(current_app.db)
-        
-        note = note_model.find_by_id(note_id)
-        
-        if not note:
-            return jsonify({'error': 'Note not found'}), 404
-        
-        # Verify the note belongs to the current therapist
-        if str(note['therapist_id']) != current_user_id:
-            return jsonify({'error': 'Unauthorized'}), 403
-        
-        return jsonify({
-            'note': note_model.to_dict(note, populate_refs=True)
-        }), 200
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
-@notes_bp.route('/<note_id>/export/pdf', methods=['GET'])
-@jwt_required()
-def export_note_pdf(note_id):
-    """Export a note as PDF"""
-    try:
-        current_user_id = get_jwt_identity()
-        note_model = Note(current_app.db)
-        
-        note = note_model.find_by_id(note_id)
-        
-        if not note:
-            return jsonify({'error': 'Note not found'}), 404
-        
-        # Verify the note belongs to the current therapist
-        if str(note['therapist_id']) != current_user_id:
-            return jsonify({'error': 'Unauthorized'}), 403
-        
-        # Convert note to dict with populated references
-        note_data = note_model.to_dict(note, populate_refs=True)
-        
-        # Generate PDF
-        pdf_service = PDFExportService()
-        pdf_bytes = pdf_service.generate_session_pdf(note_data)
-        
-        # Create filename with client name and date
-        client_name = note_data.get('client_id', {}).get('name', 'Unknown')
-        session_date = note_data.get('session_id', {}).get('scheduled_at', '')
-        filename = f"Session_Note_{client_name.replace(' ', '_')}_{session_date[:10] if session_date else 'unknown'}.pdf"
-        
-        # Return PDF file
-        return send_file(
-            io.BytesIO(pdf_bytes),
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=filename
-        )
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
-@notes_bp.route('/session/<session_id>', methods=['GET'])
-@jwt_required()
-def get_session_notes(session_id):
-    """Get all notes for a specific session"""
-    try:
-        current_user_id = get_jwt_identity()
-        
-        # Verify session belongs to therapist
-        session_model = Session(current_app.db)
-        session = session_model.find_by_id(session_id)
-        
-        if not session:
-            return jsonify({'error': 'Session not found'}), 404
-        
-        if str(session['therapist_id']) != current_user_id:
-            return jsonify({'error': 'Unauthorized'}), 403
-        
-        note_model = Note(current_app.db)
-        notes = note_model.find_by_session(session_id)
-        
-        return jsonify({
-            'notes': [note_model.to_dict(note, populate_refs=True) for note in notes]
-        }), 200
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
-@notes_bp.route('/client/<client_id>', methods=['GET'])
-@jwt_required()
-def get_client_notes(client_id):
-    """Get all notes for a specific client"""
-    try:
-        current_user_id = get_jwt_identity()
-        
-        # Verify client belongs to therapist
-        client_model = Client(current_app.db)
-        client = client_model.find_by_id(client_id)
-        
-        if not client:
-            return jsonify({'error': 'Client not found'}), 404
-        
-        if str(client['therapist_id']) != current_user_id:
-            return jsonify({'error': 'Unauthorized'}), 403
-        
-        note_model = Note(current_app.db)
-        limit = request.args.get('limit', type=int)
-        notes = note_model.find_by_client(client_id, limit)
-        
-        return jsonify({
-            'notes': [note_model.to_dict(note, populate_refs=True) for note in notes]
-        }), 200
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
-@notes_bp.route('/', methods=['POST'])
-@jwt_required()
-def create_note():
-    """Create a new note"""
-    try:
-        current_user_id = get_jwt_identity()
-        data = request.get_json()
-        
-        # Validate required fields
-        required_fields = ['client_id', 'content']
-        if not all(field in data for field in required_fields):
-            return jsonify({'error': 'Missing required fields'}), 400
-        
-        # Verify client belongs to therapist
-        client_model = Client(current_app.db)
-        client = client_model.find_by_id(data['client_id'])
-        
-        if not client:
-            return jsonify({'error': 'Client not found'}), 404
-        
-        if str(client['therapist_id']) != current_user_id:
-            return jsonify({'error': 'Unauthorized'}), 403
-        
-        # If session_id is provided, verify it belongs to the client
-        if data.get('session_id'):
-            session_model = Session(current_app.db)
-            session = session_model.find_by_id(data['session_id'])
-            
-            if not session:
-                return jsonify({'error': 'Session not found'}), 404
-            
-            if str(session['client_id']) != data['client_id']:
-                return jsonify({'error': 'Session does not belong to this client'}), 400
-        
-        note_model = Note(current_app.db)
-        
-        # Create note
-        note_id = note_model.create_note(
-            therapist_id=current_user_id,
-            client_id=data['client_id'],
-            session_id=data.get('session_id'),
-            content=data['content'],
-            note_type=data.get('note_type', 'session')
-        )
-        
-        note = note_model.find_by_id(note_id)
-        
-        return jsonify({
-            'message': 'Note created successfully',
-            'note': note_model.to_dict(note, populate_refs=True)
-        }), 201
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
-@notes_bp.route('/<note_id>', methods=['PUT'])
-@jwt_required()
-def update_note(note_id):
-    """Update a note"""
-    try:
-        current_user_id = get_jwt_identity()
-        data = request.get_json()
-        
-        if not data.get('content'):
-            return jsonify({'error': 'Content is required'}), 400
-        
-        note_model = Note(current_app.db)
-        note = note_model.find_by_id(note_id)
-        
-        if not note:
-            return jsonify({'error': 'Note not found'}), 404
-        
-        # Verify the note belongs to the current therapist
-        if str(note['therapist_id']) != current_user_id:
-            return jsonify({'error': 'Unauthorized'}), 403
-        
-        if note_model.update_note(note_id, data['content']):
-            updated_note = note_model.find_by_id(note_id)
-            return jsonify({
-                'message': 'Note updated successfully',
-                'note': note_model.to_dict(updated_note, populate_refs=True)
-            }), 200
-        else:
-            return jsonify({'error': 'Failed to update note'}), 500
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
-@notes_bp.route('/<note_id>', methods=['DELETE'])
-@jwt_required()
-def delete_note(note_id):
-    """Delete a note"""
-    try:
-        current_user_id = get_jwt_identity()
-        note_model = Note(current_app.db)
-        
-        note = note_model.find_by_id(note_id)
-        
-        if not note:
-            return jsonify({'error': 'Note not found'}), 404
-        
-        # Verify the note belongs to the current therapist
-        if str(note['therapist_id']) != current_user_id:
-            return jsonify({'error': 'Unauthorized'}), 403
-        
-        if note_model.delete_note(note_id):
-            return jsonify({
-                'message': 'Note deleted successfully'
-            }), 200
-        else:
-            return jsonify({'error': 'Failed to delete note'}), 500
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
-@notes_bp.route('/previous-session/<client_id>/<current_session_id>', methods=['GET'])
-@jwt_required()
-def get_previous_session_notes(client_id, current_session_id):
-    """Get notes from the previous session for a client"""
-    try:
-        current_user_id = get_jwt_identity()
-        
-        # Verify client belongs to therapist
-        client_model = Client(current_app.db)
-        client = client_model.find_by_id(client_id)
-        
-        if not client:
-            return jsonify({'error': 'Client not found'}), 404
-        
-        if str(client['therapist_id']) != current_user_id:
-            return jsonify({'error': 'Unauthorized'}), 403
-        
-        # Get current session to find its date
-        session_model = Session(current_app.db)
-        current_session = session_model.find_by_id(current_session_id)
-        
-        if not current_session:
-            return jsonify({'error': 'Current session not found'}), 404
-        
-        # Get all completed sessions for this client before the current session date
-        from bson.objectid import ObjectId
-        from datetime import datetime
-        
-        current_session_date = current_session.get('scheduled_date')
-        
-        pipeline = [
-            {
-                '$match': {
-                    'client_id': ObjectId(client_id),
-                    'therapist_id': ObjectId(current_user_id),
-                    'status': 'completed',
-                    '_id': {'$ne': ObjectId(current_session_id)},
-                    'scheduled_date': {'$lt': current_session_date} if current_session_date else {}
-                }
-            },
-            {'$sort': {'scheduled_date': -1}},
-            {'$limit': 1}
-        ]
-        
-        previous_sessions = list(current_app.db.sessions.aggregate(pipeline))
-        
-        if not previous_sessions:
-            return jsonify({
-                'has_previous': False,
-                'message': 'No previous session found',
-                'note': None
-            }), 200
-        
-        previous_session = previous_sessions[0]
-        previous_session_id = str(previous_session['_id'])
-        
-        # Get notes for the previous session
-        note_model = Note(current_app.db)
-        notes = note_model.find_by_session(previous_session_id)
-        
-        if not notes:
-            return jsonify({
-                'has_previous': True,
-                'has_notes': False,
-                'message': 'Previous session exists but no notes found',
-                'note': None,
-                'previous_session_date': previous_session.get('scheduled_date').isoformat() if previous_session.get('scheduled_date') else None
-            }), 200
-        
-        # Get the most recent note
-        latest_note = notes[0]
-        note_dict = note_model.to_dict(latest_note, populate_refs=True)
-        
-        # Extract key information
-        summary_data = {
-            'has_previous': True,
-            'has_notes': True,
-            'note_id': note_dict['_id'],
-            'summary': note_dict.get('ai_summary', note_dict.get('content', '')[:500]),
-            'action_items': note_dict.get('action_items', []),
-            'full_content': note_dict.get('content'),
-            'previous_session_date': previous_session.get('scheduled_date').isoformat() if previous_session.get('scheduled_date') else None,
-            'created_at': note_dict.get('created_at')
-        }
-        
-        return jsonify(summary_data), 200
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+from flask import Blueprint, request, jsonify, current_app, send_file
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from models.note import Note
+from models.client import Client
+from models.session import Session
+from services.pdf_service import PDFExportService
+import io
+
+notes_bp = Blueprint('notes', __name__)
+
+@notes_bp.route('/', methods=['GET'])
+@jwt_required()
+def get_notes():
+    """Get all notes for the current therapist"""
+    try:
+        current_user_id = get_jwt_identity()
+        note_model = Note(current_app.db)
+        
+        limit = request.args.get('limit', type=int)
+        notes = note_model.find_by_therapist(current_user_id, limit)
+        
+        return jsonify({
+            'notes': [note_model.to_dict(note, populate_refs=True) for note in notes]
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@notes_bp.route('/<note_id>', methods=['GET'])
+@jwt_required()
+def get_note(note_id):
+    """Get a specific note"""
+    try:
+        current_user_id = get_jwt_identity()
+        note_model = Note(current_app.db)
+        
+        note = note_model.find_by_id(note_id)
+        
+        if not note:
+            return jsonify({'error': 'Note not found'}), 404
+        
+        # Verify the note belongs to the current therapist
+        if str(note['therapist_id']) != current_user_id:
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        return jsonify({
+            'note': note_model.to_dict(note, populate_refs=True)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@notes_bp.route('/<note_id>/export/pdf', methods=['GET'])
+@jwt_required()
+def export_note_pdf(note_id):
+    """Export a note as PDF"""
+    try:
+        current_user_id = get_jwt_identity()
+        note_model = Note(current_app.db)
+        
+        note = note_model.find_by_id(note_id)
+        
+        if not note:
+            return jsonify({'error': 'Note not found'}), 404
+        
+        # Verify the note belongs to the current therapist
+        if str(note['therapist_id']) != current_user_id:
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        # Convert note to dict with populated references
+        note_data = note_model.to_dict(note, populate_refs=True)
+        
+        # Generate PDF
+        pdf_service = PDFExportService()
+        pdf_bytes = pdf_service.generate_session_pdf(note_data)
+        
+        # Create filename with client name and date
+        client_name = note_data.get('client_id', {}).get('name', 'Unknown')
+        session_date = note_data.get('session_id', {}).get('scheduled_at', '')
+        filename = f"Session_Note_{client_name.replace(' ', '_')}_{session_date[:10] if session_date else 'unknown'}.pdf"
+        
+        # Return PDF file
+        return send_file(
+            io.BytesIO(pdf_bytes),
+            mimetype='application/pdf',
+            as_attachment=True,
+            download_name=filename
+        )
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@notes_bp.route('/session/<session_id>', methods=['GET'])
+@jwt_required()
+def get_session_notes(session_id):
+    """Get all notes for a specific session"""
+    try:
+        current_user_id = get_jwt_identity()
+        
+        # Verify session belongs to therapist
+        session_model = Session(current_app.db)
+        session = session_model.find_by_id(session_id)
+        
+        if not session:
+            return jsonify({'error': 'Session not found'}), 404
+        
+        if str(session['therapist_id']) != current_user_id:
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        note_model = Note(current_app.db)
+        notes = note_model.find_by_session(session_id)
+        
+        return jsonify({
+            'notes': [note_model.to_dict(note, populate_refs=True) for note in notes]
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@notes_bp.route('/client/<client_id>', methods=['GET'])
+@jwt_required()
+def get_client_notes(client_id):
+    """Get all notes for a specific client"""
+    try:
+        current_user_id = get_jwt_identity()
+        
+        # Verify client belongs to therapist
+        client_model = Client(current_app.db)
+        client = client_model.find_by_id(client_id)
+        
+        if not client:
+            return jsonify({'error': 'Client not found'}), 404
+        
+        if str(client['therapist_id']) != current_user_id:
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        note_model = Note(current_app.db)
+        limit = request.args.get('limit', type=int)
+        notes = note_model.find_by_client(client_id, limit)
+        
+        return jsonify({
+            'notes': [note_model.to_dict(note, populate_refs=True) for note in notes]
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@notes_bp.route('/', methods=['POST'])
+@jwt_required()
+def create_note():
+    """Create a new note"""
+    try:
+        current_user_id = get_jwt_identity()
+        data = request.get_json()
+        
+        # Validate required fields
+        required_fields = ['client_id', 'content']
+        if not all(field in data for field in required_fields):
+            return jsonify({'error': 'Missing required fields'}), 400
+        
+        # Verify client belongs to therapist
+        client_model = Client(current_app.db)
+        client = client_model.find_by_id(data['client_id'])
+        
+        if not client:
+            return jsonify({'error': 'Client not found'}), 404
+        
+        if str(client['therapist_id']) != current_user_id:
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        # If session_id is provided, verify it belongs to the client
+        if data.get('session_id'):
+            session_model = Session(current_app.db)
+            session = session_model.find_by_id(data['session_id'])
+            
+            if not session:
+                return jsonify({'error': 'Session not found'}), 404
+            
+            if str(session['client_id']) != data['client_id']:
+                return jsonify({'error': 'Session does not belong to this client'}), 400
+        
+        note_model = Note(current_app.db)
+        
+        # Create note
+        note_id = note_model.create_note(
+            therapist_id=current_user_id,
+            client_id=data['client_id'],
+            session_id=data.get('session_id'),
+            content=data['content'],
+            note_type=data.get('note_type', 'session')
+        )
+        
+        # New note changes the client's recent context; drop the cached copy
+        from services.summary_service import SummaryService
+        SummaryService.invalidate_client(data['client_id'])
+        
+        note = note_model.find_by_id(note_id)
+        
+        return jsonify({
+            'message': 'Note created successfully',
+            'note': note_model.to_dict(note, populate_refs=True)
+        }), 201
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@notes_bp.route('/<note_id>', methods=['PUT'])
+@jwt_required()
+def update_note(note_id):
+    """Update a note"""
+    try:
+        current_user_id = get_jwt_identity()
+        data = request.get_json()
+        
+        if not data.get('content'):
+            return jsonify({'error': 'Content is required'}), 400
+        
+        note_model = Note(current_app.db)
+        note = note_model.find_by_id(note_id)
+        
+        if not note:
+            return jsonify({'error': 'Note not found'}), 404
+        
+        # Verify the note belongs to the current therapist
+        if str(note['therapist_id']) != current_user_id:
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        if note_model.update_note(note_id, data['content']):
+            updated_note = note_model.find_by_id(note_id)
+            return jsonify({
+                'message': 'Note updated successfully',
+                'note': note_model.to_dict(updated_note, populate_refs=True)
+            }), 200
+        else:
+            return jsonify({'error': 'Failed to update note'}), 500
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@notes_bp.route('/<note_id>', methods=['DELETE'])
+@jwt_required()
+def delete_note(note_id):
+    """Delete a note"""
+    try:
+        current_user_id = get_jwt_identity()
+        note_model = Note(current_app.db)
+        
+        note = note_model.find_by_id(note_id)
+        
+        if not note:
+            return jsonify({'error': 'Note not found'}), 404
+        
+        # Verify the note belongs to the current therapist
+        if str(note['therapist_id']) != current_user_id:
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        if note_model.delete_note(note_id):
+            return jsonify({
+                'message': 'Note deleted successfully'
+            }), 200
+        else:
+            return jsonify({'error': 'Failed to delete note'}), 500
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@notes_bp.route('/previous-session/<client_id>/<current_session_id>', methods=['GET'])
+@jwt_required()
+def get_previous_session_notes(client_id, current_session_id):
+    """Get notes from the previous session for a client"""
+    try:
+        current_user_id = get_jwt_identity()
+        
+        # Verify client belongs to therapist
+        client_model = Client(current_app.db)
+        client = client_model.find_by_id(client_id)
+        
+        if not client:
+            return jsonify({'error': 'Client not found'}), 404
+        
+        if str(client['therapist_id']) != current_user_id:
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        # Get current session to find its date
+        session_model = Session(current_app.db)
+        current_session = session_model.find_by_id(current_session_id)
+        
+        if not current_session:
+            return jsonify({'error': 'Current session not found'}), 404
+        
+        # Get all completed sessions for this client before the current session date
+        from bson.objectid import ObjectId
+        from datetime import datetime
+        
+        current_session_date = current_session.get('scheduled_date')
+        
+        pipeline = [
+            {
+                '$match': {
+                    'client_id': ObjectId(client_id),
+                    'therapist_id': ObjectId(current_user_id),
+                    'status': 'completed',
+                    '_id': {'$ne': ObjectId(current_session_id)},
+                    'scheduled_date': {'$lt': current_session_date} if current_session_date else {}
+                }
+            },
+            {'$sort': {'scheduled_date': -1}},
+            {'$limit': 1}
+        ]
+        
+        previous_sessions = list(current_app.db.sessions.aggregate(pipeline))
+        
+        if not previous_sessions:
+            return jsonify({
+                'has_previous': False,
+                'message': 'No previous session found',
+                'note': None
+            }), 200
+        
+        previous_session = previous_sessions[0]
+        previous_session_id = str(previous_session['_id'])
+        
+        # Get notes for the previous session
+        note_model = Note(current_app.db)
+        notes = note_model.find_by_session(previous_session_id)
+        
+        if not notes:
+            return jsonify({
+                'has_previous': True,
+                'has_notes': False,
+                'message': 'Previous session exists but no notes found',
+                'note': None,
+                'previous_session_date': previous_session.get('scheduled_date').isoformat() if previous_session.get('scheduled_date') else None
+            }), 200
+        
+        # Get the most recent note
+        latest_note = notes[0]
+        note_dict = note_model.to_dict(latest_note, populate_refs=True)
+        
+        # Extract key information
+        summary_data = {
+            'has_previous': True,
+            'has_notes': True,
+            'note_id': note_dict['_id'],
+            'summary': note_dict.get('ai_summary', note_dict.get('content', '')[:500]),
+            'action_items': note_dict.get('action_items', []),
+            'full_content': note_dict.get('content'),
+            'previous_session_date': previous_session.get('scheduled_date').isoformat() if previous_session.get('scheduled_date') else None,
+            'created_at': note_dict.get('created_at')
+        }
+        
+        return jsonify(summary_data), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
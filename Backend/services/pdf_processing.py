@@ -2,11 +2,59 @@
 PDF Processing Service
 Handles PDF extraction and chunking for RAG pipeline
 """
+import multiprocessing
 import os
-from typing import List, Dict
+from dataclasses import dataclass
+from typing import List, Dict, Optional
 import PyPDF2
 
 
+@dataclass(slots=True, frozen=True)
+class Chunk:
+    """
+    One indexable chunk of text plus its metadata
+
+    Slotted instead of nested {"text": ..., "metadata": {...}} dicts: an
+    ingest pass can hold tens of thousands of these in memory at once, and a
+    slotted record is a fraction of the size of two dicts.
+    """
+    text: str
+    source: str
+    type: str
+    chunk_index: int = 0
+    path: Optional[str] = None
+    client_id: Optional[str] = None
+    note_id: Optional[str] = None
+    session_date: Optional[str] = None
+    client_name: Optional[str] = None
+
+    def metadata(self) -> Dict[str, any]:
+        """Metadata dict in the shape stored in the vector store (unset fields skipped)"""
+        meta = {
+            "source": self.source,
+            "type": self.type,
+            "chunk_index": self.chunk_index
+        }
+        if self.path is not None:
+            meta["path"] = self.path
+        if self.client_id is not None:
+            meta["client_id"] = self.client_id
+        if self.note_id is not None:
+            meta["note_id"] = self.note_id
+        if self.session_date is not None:
+            meta["session_date"] = self.session_date
+        if self.client_name is not None:
+            meta["client_name"] = self.client_name
+        return meta
+
+
+def _process_one_pdf(args) -> List[Chunk]:
+    """Process a single PDF in a worker process (module-level for pickling)"""
+    pdf_path, chunk_size = args
+    processor = PDFProcessor(os.path.dirname(pdf_path) or ".")
+    return processor.process_pdf(pdf_path, chunk_size=chunk_size)
+
+
 class PDFProcessor:
     def __init__(self, docs_folder: str = "./docs"):
         """Initialize PDF processor with docs folder path"""
@@ -58,10 +106,10 @@ class PDFProcessor:
         
         return chunks
     
-    def process_pdf(self, pdf_path: str, chunk_size: int = 1000) -> List[Dict[str, any]]:
+    def process_pdf(self, pdf_path: str, chunk_size: int = 1000) -> List[Chunk]:
         """
         Process a single PDF file: extract text and chunk it
-        
+
         Returns:
             List of chunks with metadata
         """
@@ -83,22 +131,20 @@ class PDFProcessor:
         
         # Add metadata to each chunk
         processed_chunks = [
-            {
-                "text": chunk,
-                "metadata": {
-                    "source": filename,
-                    "path": pdf_path,
-                    "chunk_index": i,
-                    "type": "pdf"
-                }
-            }
+            Chunk(
+                text=chunk,
+                source=filename,
+                type="pdf",
+                chunk_index=i,
+                path=pdf_path
+            )
             for i, chunk in enumerate(chunks)
         ]
         
         print(f"Extracted {len(processed_chunks)} chunks from {filename}")
         return processed_chunks
     
-    def process_all_pdfs(self, chunk_size: int = 1000) -> List[Dict[str, any]]:
+    def process_all_pdfs(self, chunk_size: int = 1000) -> List[Chunk]:
         """
         Process all PDFs in the docs folder
         
@@ -118,10 +164,18 @@ class PDFProcessor:
             return all_chunks
         
         print(f"Found {len(pdf_files)} PDF files")
-        
-        for pdf_file in pdf_files:
-            pdf_path = os.path.join(self.docs_folder, pdf_file)
-            chunks = self.process_pdf(pdf_path, chunk_size=chunk_size)
-            all_chunks.extend(chunks)
-        
+
+        pdf_paths = [os.path.join(self.docs_folder, f) for f in pdf_files]
+
+        if len(pdf_paths) > 1:
+            # Text extraction is CPU-bound, so chunk each file in its own
+            # worker process and concatenate the results
+            workers = min(len(pdf_paths), max((os.cpu_count() or 2) - 1, 1))
+            with multiprocessing.Pool(workers) as pool:
+                for chunks in pool.imap(_process_one_pdf, [(p, chunk_size) for p in pdf_paths]):
+                    all_chunks.extend(chunks)
+        else:
+            for pdf_path in pdf_paths:
+                all_chunks.extend(self.process_pdf(pdf_path, chunk_size=chunk_size))
+
         return all_chunks
@@ -8,8 +8,131 @@ from reportlab.lib.units import inch
 from reportlab.lib.colors import HexColor
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak, Table, TableStyle
 from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_JUSTIFY
+from reportlab.pdfbase import pdfmetrics
 from datetime import datetime
+from functools import lru_cache
+from html import escape as _html_escape
+import asyncio
+import concurrent.futures
 import io
+import os
+import re
+import sys
+import numpy as np
+
+# datetime.fromisoformat handles a trailing 'Z' natively on Python 3.11+;
+# older interpreters need the replace() shim (and its extra string allocation)
+if sys.version_info >= (3, 11):
+    _parse_iso = datetime.fromisoformat
+else:
+    def _parse_iso(value):
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+# Warm ReportLab's font cache once at import so Paragraph layout doesn't
+# re-resolve these names for every flowable during doc.build
+for _font_name in ('Helvetica', 'Helvetica-Bold', 'Courier'):
+    pdfmetrics.getFont(_font_name)
+
+# Metadata table style (10 rules - build once, not per PDF)
+_METADATA_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (0, -1), HexColor('#f3f4f6')),
+    ('TEXTCOLOR', (0, 0), (0, -1), HexColor('#374151')),
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('GRID', (0, 0), (-1, -1), 0.5, HexColor('#d1d5db')),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('LEFTPADDING', (0, 0), (-1, -1), 10),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 10),
+    ('TOPPADDING', (0, 0), (-1, -1), 8),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+])
+
+# Single style shared by every transcript table (built once, not per PDF)
+_TRANSCRIPT_TABLE_STYLE = TableStyle([
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('LEFTPADDING', (0, 0), (-1, -1), 0),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 6),
+    ('TOPPADDING', (0, 0), (-1, -1), 2),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+])
+
+
+@lru_cache(maxsize=2048)
+def _markdown_to_html(text: str) -> str:
+    """Convert a line of markdown to ReportLab HTML.
+
+    Cached because summaries repeat identical lines (disclaimers, boilerplate
+    action items) both within one document and across exports.
+    """
+    # Single scan: split on **bold**/*italic* tokens, escape each span and
+    # wrap matched spans in tags - no placeholder round-trips
+    parts = []
+    for chunk in _TOKEN_RE.split(text.replace('⭐', '★')):
+        if not chunk:
+            continue
+        if chunk.startswith('**') and chunk.endswith('**') and len(chunk) > 4:
+            parts.append(f'<b>{_html_escape(chunk[2:-2], quote=False)}</b>')
+        elif chunk.startswith('*') and chunk.endswith('*') and len(chunk) > 2:
+            parts.append(f'<i>{_html_escape(chunk[1:-1], quote=False)}</i>')
+        else:
+            parts.append(_html_escape(chunk, quote=False))
+    return ''.join(parts)
+
+# Precompiled markdown token pattern: one split picks out **bold** and *italic*
+# spans in a single pass (compiling per line is wasteful on long summaries)
+_TOKEN_RE = re.compile(r'(\*\*.+?\*\*|\*.+?\*)')
+
+# Worker pool for CPU-bound PDF builds; created lazily so importing the
+# service doesn't fork processes
+_PDF_POOL = None
+
+
+def _get_pdf_pool():
+    global _PDF_POOL
+    if _PDF_POOL is None:
+        _PDF_POOL = concurrent.futures.ProcessPoolExecutor(max_workers=os.cpu_count())
+    return _PDF_POOL
+
+
+def _build_pdf(note_data: dict) -> bytes:
+    """Build a session PDF in a worker process (dict in, bytes out)"""
+    return PDFExportService().generate_session_pdf(note_data)
+
+
+# Transcripts longer than this are split into sub-documents rendered in
+# parallel and stitched together, avoiding Platypus's worst-case page-break
+# cost on one huge flowable list
+_TRANSCRIPT_SHARD_THRESHOLD = 200
+_TRANSCRIPT_SHARD_SIZE = 200
+
+# Optional note sections, resolved with one set intersection per export
+_OPTIONAL_SECTIONS = frozenset({'ai_summary', 'action_items', 'transcript'})
+
+
+def _transcript_table(rows) -> Table:
+    """Wrap prepared transcript rows in the shared table layout"""
+    return Table(
+        rows,
+        colWidths=[1.4 * inch, 5.1 * inch],
+        style=_TRANSCRIPT_TABLE_STYLE,
+        splitByRow=1
+    )
+
+
+def _build_transcript_part(segments: list) -> bytes:
+    """Render one transcript shard as a standalone PDF (worker process)"""
+    service = PDFExportService()
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=letter,
+        rightMargin=72,
+        leftMargin=72,
+        topMargin=72,
+        bottomMargin=72
+    )
+    doc.build([_transcript_table(service._transcript_rows(segments))])
+    return buffer.getvalue()
 
 class PDFExportService:
     """Service for exporting session notes to PDF"""
@@ -18,6 +141,16 @@ class PDFExportService:
         """Initialize PDF export service"""
         self.styles = getSampleStyleSheet()
         self._setup_custom_styles()
+        # Section titles are constant - build their Paragraphs once
+        self._section_headers = {}
+
+    def _section_header(self, text: str) -> Paragraph:
+        """Return a memoized Paragraph for a constant section title"""
+        header = self._section_headers.get(text)
+        if header is None:
+            header = Paragraph(text, self.styles['SectionHeader'])
+            self._section_headers[text] = header
+        return header
     
     def _setup_custom_styles(self):
         """Setup custom paragraph styles"""
@@ -65,18 +198,43 @@ class PDFExportService:
             textColor=HexColor('#6b7280'),
             fontName='Courier'
         ))
+
+        # Bold header style (used for ** and ## headers inside summaries)
+        self.styles.add(ParagraphStyle(
+            name='BoldHeader',
+            parent=self.styles['BodyText'],
+            fontSize=12,
+            textColor=HexColor('#1f2937'),
+            spaceBefore=10,
+            spaceAfter=5,
+            fontName='Helvetica-Bold'
+        ))
     
-    def generate_session_pdf(self, note_data: dict) -> bytes:
+    def generate_session_pdf(self, note_data: dict, out=None) -> bytes:
         """
         Generate PDF from session note data
-        
+
         Args:
             note_data: Dictionary containing note information
-            
+            out: Optional writable file-like object; when provided the PDF is
+                 streamed into it directly (no intermediate bytes copy)
+
         Returns:
-            PDF file as bytes
+            PDF file as bytes (empty bytes when streaming to `out`)
         """
-        buffer = io.BytesIO()
+        # Long list transcripts are sharded into sub-documents built in the
+        # worker pool; kick the shards off first so they render while the
+        # main document is being built
+        transcript = note_data.get('transcript')
+        shard_futures = None
+        if isinstance(transcript, list) and len(transcript) > _TRANSCRIPT_SHARD_THRESHOLD:
+            pool = _get_pdf_pool()
+            shard_futures = [
+                pool.submit(_build_transcript_part, transcript[i:i + _TRANSCRIPT_SHARD_SIZE])
+                for i in range(0, len(transcript), _TRANSCRIPT_SHARD_SIZE)
+            ]
+
+        buffer = io.BytesIO() if (out is None or shard_futures) else out
         doc = SimpleDocTemplate(
             buffer,
             pagesize=letter,
@@ -97,7 +255,7 @@ class PDFExportService:
         session_date = note_data.get('session_date', 'Unknown')
         if isinstance(session_date, str):
             try:
-                session_date = datetime.fromisoformat(session_date.replace('Z', '+00:00'))
+                session_date = _parse_iso(session_date)
                 session_date = session_date.strftime('%B %d, %Y at %I:%M %p')
             except:
                 pass
@@ -108,28 +266,20 @@ class PDFExportService:
             ['Session Date:', str(session_date)],
             ['Client:', client_name],
             ['Note Type:', note_data.get('note_type', 'clinical').title()],
-            ['Created:', datetime.fromisoformat(note_data['created_at'].replace('Z', '+00:00')).strftime('%B %d, %Y')]
+            ['Created:', _parse_iso(note_data['created_at']).strftime('%B %d, %Y')]
         ]
         
         t = Table(metadata, colWidths=[2*inch, 4*inch])
-        t.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), HexColor('#f3f4f6')),
-            ('TEXTCOLOR', (0, 0), (0, -1), HexColor('#374151')),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('GRID', (0, 0), (-1, -1), 0.5, HexColor('#d1d5db')),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('LEFTPADDING', (0, 0), (-1, -1), 10),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 10),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ]))
+        t.setStyle(_METADATA_TABLE_STYLE)
         story.append(t)
         story.append(Spacer(1, 0.3 * inch))
-        
+
+        # Resolve which optional sections exist with a single set intersection
+        present = {k for k in note_data.keys() & _OPTIONAL_SECTIONS if note_data[k]}
+
         # AI Summary Section
-        if note_data.get('ai_summary'):
-            story.append(Paragraph('AI-Generated Clinical Summary', self.styles['SectionHeader']))
+        if 'ai_summary' in present:
+            story.append(self._section_header('AI-Generated Clinical Summary'))
             story.append(Spacer(1, 0.1 * inch))
             
             # Format summary with markdown-like parsing
@@ -139,9 +289,9 @@ class PDFExportService:
                 story.append(Spacer(1, 0.1 * inch))
         
         # Action Items Section
-        if note_data.get('action_items'):
+        if 'action_items' in present:
             story.append(Spacer(1, 0.2 * inch))
-            story.append(Paragraph('Action Items & Recommendations', self.styles['SectionHeader']))
+            story.append(self._section_header('Action Items & Recommendations'))
             story.append(Spacer(1, 0.1 * inch))
             
             action_items = note_data['action_items']
@@ -153,30 +303,18 @@ class PDFExportService:
                 story.append(Paragraph(action_items, self.styles['BodyJustify']))
         
         # Full Transcript Section
-        if note_data.get('transcript'):
+        if 'transcript' in present:
             story.append(PageBreak())
-            story.append(Paragraph('Complete Session Transcript', self.styles['SectionHeader']))
+            story.append(self._section_header('Complete Session Transcript'))
             story.append(Spacer(1, 0.1 * inch))
             
-            transcript = note_data['transcript']
             if isinstance(transcript, list):
-                for segment in transcript:
-                    timestamp = segment.get('start', 0)
-                    speaker = segment.get('speaker', 'Speaker')
-                    text = segment.get('text', '')
-                    
-                    # Format timestamp
-                    minutes = int(timestamp // 60)
-                    seconds = int(timestamp % 60)
-                    time_str = f"[{minutes:02d}:{seconds:02d}]"
-                    
-                    # Add timestamp and speaker
-                    story.append(Paragraph(
-                        f'<b>{time_str} {speaker}:</b>',
-                        self.styles['Timestamp']
-                    ))
-                    story.append(Paragraph(text, self.styles['BodyJustify']))
-                    story.append(Spacer(1, 0.05 * inch))
+                if shard_futures is None:
+                    rows = self._transcript_rows(transcript)
+                    if rows:
+                        story.append(_transcript_table(rows))
+                # When sharded, the transcript pages are built in worker
+                # processes and appended after the main build below
             else:
                 # Text transcript
                 story.append(Paragraph(transcript, self.styles['BodyJustify']))
@@ -197,101 +335,123 @@ class PDFExportService:
         
         # Build PDF
         doc.build(story)
-        
-        # Get PDF bytes
-        buffer.seek(0)
+
+        # Append the parallel-rendered transcript shards
+        if shard_futures:
+            from PyPDF2 import PdfMerger
+
+            merger = PdfMerger()
+            buffer.seek(0)
+            merger.append(buffer)
+            for future in shard_futures:
+                merger.append(io.BytesIO(future.result()))
+
+            target = out if out is not None else io.BytesIO()
+            merger.write(target)
+            merger.close()
+            if out is not None:
+                return b''
+            return target.getvalue()
+
+        # When streaming to a caller-provided file the bytes are already there
+        if out is not None:
+            return b''
+
+        # Get PDF bytes (single copy out of the buffer)
         return buffer.getvalue()
+
+    async def generate_session_pdf_async(self, note_data: dict) -> bytes:
+        """
+        Build the PDF in a worker process so async callers aren't blocked
+
+        ReportLab layout is CPU-bound and holds the GIL, so a thread pool
+        would not help; each job is pickle-friendly (dict in, bytes out).
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_pdf_pool(), _build_pdf, note_data)
     
+    def _transcript_rows(self, transcript: list) -> list:
+        """Build [timestamp, text] table rows for transcript segments"""
+        # Vectorize timestamp formatting: two C-level divmod/format passes
+        # instead of a Python division + f-string per segment
+        starts = np.asarray([s.get('start', 0) for s in transcript], dtype=np.int64)
+        minutes, seconds = np.divmod(starts, 60)
+        time_strs = np.char.add(
+            np.char.add('[', np.char.zfill(minutes.astype('U4'), 2)),
+            np.char.add(':', np.char.add(np.char.zfill(seconds.astype('U2'), 2), ']'))
+        )
+
+        rows = []
+        for time_str, segment in zip(time_strs, transcript):
+            speaker = segment.get('speaker', 'Speaker')
+            text = segment.get('text', '')
+
+            rows.append([
+                Paragraph(f'<b>{time_str} {speaker}:</b>', self.styles['Timestamp']),
+                Paragraph(text, self.styles['BodyJustify'])
+            ])
+
+        return rows
+
     def _format_summary(self, summary_text: str) -> list:
         """Format summary text into styled paragraphs with full markdown support"""
         paragraphs = []
         lines = summary_text.split('\n')
-        
+
+        # Consecutive body lines are folded into a single Paragraph (joined with
+        # <br/>) so doc.build lays out far fewer flowables on long summaries
+        body_lines = []
+
+        def flush_body():
+            if body_lines:
+                paragraphs.append(Paragraph('<br/>'.join(body_lines), self.styles['BodyJustify']))
+                body_lines.clear()
+
         for line in lines:
             line = line.strip()
             if not line:
                 continue
-            
+
             # Check for headers (lines with ** markers or ##)
             if line.startswith('**') and line.endswith('**') and line.count('**') == 2:
                 # Bold header (entire line is wrapped in **)
+                flush_body()
                 text = line.strip('*')
                 paragraphs.append(Paragraph(
                     f'<b>{self._escape_html(text)}</b>',
-                    ParagraphStyle(
-                        'BoldHeader',
-                        parent=self.styles['BodyText'],
-                        fontSize=12,
-                        textColor=HexColor('#1f2937'),
-                        spaceBefore=10,
-                        spaceAfter=5,
-                        fontName='Helvetica-Bold'
-                    )
+                    self.styles['BoldHeader']
                 ))
             elif line.startswith('##'):
                 # Markdown header
+                flush_body()
                 text = line.lstrip('#').strip()
                 paragraphs.append(Paragraph(
                     f'<b>{self._escape_html(text)}</b>',
-                    ParagraphStyle(
-                        'BoldHeader',
-                        parent=self.styles['BodyText'],
-                        fontSize=12,
-                        textColor=HexColor('#1f2937'),
-                        spaceBefore=10,
-                        spaceAfter=5,
-                        fontName='Helvetica-Bold'
-                    )
+                    self.styles['BoldHeader']
                 ))
             elif line.startswith('* '):
                 # Bullet point (with space after asterisk)
+                flush_body()
                 text = line[2:].strip()  # Remove '* '
                 formatted_text = self._convert_markdown_to_html(text)
                 paragraphs.append(Paragraph(f'• {formatted_text}', self.styles['BodyJustify']))
             elif line.startswith('-') or line.startswith('•'):
                 # Bullet point (with dash or bullet)
+                flush_body()
                 text = line.lstrip('-•').strip()
                 formatted_text = self._convert_markdown_to_html(text)
                 paragraphs.append(Paragraph(f'• {formatted_text}', self.styles['BodyJustify']))
             else:
                 # Regular paragraph - convert inline markdown
-                formatted_text = self._convert_markdown_to_html(line)
-                paragraphs.append(Paragraph(formatted_text, self.styles['BodyJustify']))
-        
+                body_lines.append(self._convert_markdown_to_html(line))
+
+        flush_body()
         return paragraphs
     
     def _convert_markdown_to_html(self, text: str) -> str:
         """Convert markdown formatting to HTML for ReportLab"""
-        import re
-        
-        # First escape existing HTML special characters in the text content
-        # But we need to be careful - escape them, then add our HTML tags
-        
-        # Convert ⭐ emoji to star symbol
-        text = text.replace('⭐', '★')
-        
-        # Convert **bold** to <b>bold</b> - using temp placeholders
-        text = re.sub(r'\*\*(.+?)\*\*', r'<<<BOLD_START>>>\1<<<BOLD_END>>>', text)
-        
-        # Convert remaining *italic* to <i>italic</i>
-        text = re.sub(r'\*(.+?)\*', r'<<<ITALIC_START>>>\1<<<ITALIC_END>>>', text)
-        
-        # Now escape HTML special characters in the actual text
-        text = text.replace('&', '&amp;')
-        text = text.replace('<', '&lt;')
-        text = text.replace('>', '&gt;')
-        
-        # Now replace our placeholders with actual HTML tags
-        text = text.replace('<<<BOLD_START>>>', '<b>')
-        text = text.replace('<<<BOLD_END>>>', '</b>')
-        text = text.replace('<<<ITALIC_START>>>', '<i>')
-        text = text.replace('<<<ITALIC_END>>>', '</i>')
-        
-        return text
+        return _markdown_to_html(text)
     
     def _escape_html(self, text: str) -> str:
         """Escape HTML special characters"""
-        text = text.replace('&', '&amp;')
-        text = text.replace('<', '&lt;')
-        text = text.replace('>', '&gt;')
-        return text
+        return _html_escape(text, quote=False)
@@ -6,12 +6,106 @@ Generates contextual therapeutic questions based on:
 - Previous session notes (RAG)
 """
 import os
+import time
+from dataclasses import dataclass
 from groq import Groq
 
+# Live sessions can request a question on every emotion tick; identical
+# context within this window reuses the previous answer instead of paying
+# another LLM round-trip
+_QUESTION_CACHE_TTL = 5.0
+_QUESTION_CACHE_MAX = 128
+
+# Fallback questions keyed by dominant emotion (score-based rules are checked
+# first; this table covers the plain emotion cases)
+_EMOTION_QUESTIONS = {
+    'sad': "I can see this is affecting you deeply. Would you like to talk about what's been weighing on you?",
+    'angry': "It seems like you're feeling frustrated. What specifically triggered these feelings?",
+    'fear': "What is it about this situation that feels frightening or overwhelming to you?",
+}
+
+_DEFAULT_QUESTION = "How does that make you feel? Can you describe the emotions you're experiencing right now?"
+
+_STRESS_QUESTION = "I notice you seem quite tense right now. Can you tell me more about what's making this situation difficult for you?"
+_ANXIETY_QUESTION = "You seem anxious. What thoughts are going through your mind at this moment?"
+_DISENGAGED_QUESTION = "I notice you've become quieter. Is there something specific you'd rather not discuss, or would it help to take a different approach?"
+
+
+def _select_question(stress, anxiety, engagement, dominant_emotion):
+    """Pure scoring/dispatch for the rule-based fallback.
+
+    Kept as a flat module-level function of plain scalars so it stays cheap
+    when called on every emotion tick of a live session.
+    """
+    if stress > 0.7:
+        return _STRESS_QUESTION
+    if anxiety > 0.6:
+        return _ANXIETY_QUESTION
+    question = _EMOTION_QUESTIONS.get(dominant_emotion)
+    if question is not None:
+        return question
+    if engagement < 0.3:
+        return _DISENGAGED_QUESTION
+    return _DEFAULT_QUESTION
+
+# Prompt templates built once at import; only the variable slots are filled
+# per call
+_CONTEXT_TMPL = """You are an AI assistant helping a therapist during a live therapy session.
+
+CURRENT EMOTION STATE:
+- Dominant emotion: {dominant_emotion}
+- Stress level: {stress_pct}%
+- Anxiety level: {anxiety_pct}%
+- Primary state: {primary_state}
+
+RECENT CONVERSATION:
+{recent_transcript}
+"""
+
+_QUESTION_PROMPT = """Based on the client's current emotional state and recent conversation, suggest ONE thoughtful, open-ended therapeutic question that the therapist could ask.
+
+GUIDELINES:
+- Be empathetic and non-judgmental
+- Ask open-ended questions (avoid yes/no)
+- Focus on feelings and underlying thoughts
+- Use reflective listening techniques
+- Keep it concise (1-2 sentences max)
+
+QUESTION:"""
+
+
+@dataclass(frozen=True, slots=True)
+class EmotionSnapshot:
+    """Flattened view of an emotion_data payload, parsed once at the boundary
+
+    Avoids re-walking the nested composite_scores/clinical_insights dicts (and
+    allocating their {} defaults) on every emotion tick.
+    """
+    dominant_emotion: str = 'neutral'
+    stress: float = 0.0
+    anxiety: float = 0.0
+    engagement: float = 0.5
+    primary_state: str = 'calm'
+
+    @classmethod
+    def from_dict(cls, emotion_data):
+        scores = emotion_data.get('composite_scores') or {}
+        insights = emotion_data.get('clinical_insights') or {}
+        return cls(
+            dominant_emotion=emotion_data.get('dominant_emotion', 'neutral'),
+            stress=scores.get('stress_score', 0),
+            anxiety=scores.get('anxiety_score', 0),
+            engagement=scores.get('engagement_score', 0.5),
+            primary_state=insights.get('primary_state', 'calm')
+        )
+
+
 class QuestionAssistant:
     def __init__(self):
         self.groq_key = os.getenv('GROQ_API_KEY')
         self.client = None
+        self._question_cache = {}  # (emotion, stress, anxiety, tail hash) -> (time, result)
+        self._last_transcript_hash = None
         if self.groq_key:
             try:
                 self.client = Groq(api_key=self.groq_key)
@@ -34,91 +128,107 @@ class QuestionAssistant:
         Returns:
             Dict with suggested question and reasoning
         """
+        # Parse the nested payload once; both paths below use the snapshot
+        snapshot = EmotionSnapshot.from_dict(emotion_data)
+
         if not self.is_available():
-            return self._fallback_question(emotion_data)
-        
+            return self._fallback_question(snapshot)
+
         try:
-            # Build context
-            dominant_emotion = emotion_data.get('dominant_emotion', 'neutral')
-            stress_score = emotion_data.get('composite_scores', {}).get('stress_score', 0)
-            anxiety_score = emotion_data.get('composite_scores', {}).get('anxiety_score', 0)
-            primary_state = emotion_data.get('clinical_insights', {}).get('primary_state', 'calm')
-            
-            context = f"""You are an AI assistant helping a therapist during a live therapy session.
+            transcript_hash = hash(recent_transcript[-500:] if recent_transcript else '')
 
-CURRENT EMOTION STATE:
-- Dominant emotion: {dominant_emotion}
-- Stress level: {int(stress_score * 100)}%
-- Anxiety level: {int(anxiety_score * 100)}%
-- Primary state: {primary_state}
+            # Flat, low-signal state with no new conversation: the LLM would
+            # return the same generic question the rule-based fallback gives
+            # for free, so skip the network round-trip entirely
+            if (snapshot.dominant_emotion == 'neutral' and snapshot.stress < 0.3
+                    and snapshot.anxiety < 0.3
+                    and transcript_hash == self._last_transcript_hash):
+                return self._fallback_question(snapshot)
+            self._last_transcript_hash = transcript_hash
 
-RECENT CONVERSATION:
-{recent_transcript}
-"""
-            
-            if previous_notes:
-                context += f"\n\nPREVIOUS SESSION CONTEXT:\n{previous_notes[:500]}"
-            
-            prompt = """Based on the client's current emotional state and recent conversation, suggest ONE thoughtful, open-ended therapeutic question that the therapist could ask.
+            # Coalesce bursts: scores rounded to 0.1 buckets plus the tail of
+            # the transcript identify a near-identical context
+            cache_key = (
+                snapshot.dominant_emotion,
+                round(snapshot.stress, 1),
+                round(snapshot.anxiety, 1),
+                transcript_hash
+            )
+            now = time.time()
+            cached = self._question_cache.get(cache_key)
+            if cached and now - cached[0] < _QUESTION_CACHE_TTL:
+                return cached[1]
 
-GUIDELINES:
-- Be empathetic and non-judgmental
-- Ask open-ended questions (avoid yes/no)
-- Focus on feelings and underlying thoughts
-- Use reflective listening techniques
-- Keep it concise (1-2 sentences max)
+            stress_pct = int(snapshot.stress * 100)
+            context = _CONTEXT_TMPL.format(
+                dominant_emotion=snapshot.dominant_emotion,
+                stress_pct=stress_pct,
+                anxiety_pct=int(snapshot.anxiety * 100),
+                primary_state=snapshot.primary_state,
+                recent_transcript=recent_transcript
+            )
+
+            if previous_notes:
+                context = ''.join((context, "\n\nPREVIOUS SESSION CONTEXT:\n", previous_notes[:500]))
 
-QUESTION:"""
-            
             response = self.client.chat.completions.create(
                 model="llama-3.3-70b-versatile",
                 messages=[
                     {"role": "system", "content": context},
-                    {"role": "user", "content": prompt}
+                    {"role": "user", "content": _QUESTION_PROMPT}
                 ],
                 temperature=0.7,
                 max_tokens=150
             )
             
             question = response.choices[0].message.content.strip()
-            
-            return {
+
+            result = {
                 'success': True,
                 'question': question,
-                'trigger': f"{dominant_emotion} emotion, {int(stress_score * 100)}% stress",
+                'trigger': f"{snapshot.dominant_emotion} emotion, {stress_pct}% stress",
                 'confidence': 0.85
             }
-            
+
+            if len(self._question_cache) >= _QUESTION_CACHE_MAX:
+                self._question_cache.clear()
+            self._question_cache[cache_key] = (now, result)
+
+            return result
+
         except Exception as e:
             print(f"[QUESTION-ASSISTANT] Error: {e}")
-            return self._fallback_question(emotion_data)
-    
-    def _fallback_question(self, emotion_data):
+            return self._fallback_question(snapshot)
+
+    def _fallback_question(self, snapshot):
         """Rule-based fallback questions when AI is unavailable"""
-        dominant_emotion = emotion_data.get('dominant_emotion', 'neutral')
-        stress_score = emotion_data.get('composite_scores', {}).get('stress_score', 0)
-        anxiety_score = emotion_data.get('composite_scores', {}).get('anxiety_score', 0)
-        
-        # Rule-based question selection
-        if stress_score > 0.7:
-            question = "I notice you seem quite tense right now. Can you tell me more about what's making this situation difficult for you?"
-        elif anxiety_score > 0.6:
-            question = "You seem anxious. What thoughts are going through your mind at this moment?"
-        elif dominant_emotion == 'sad':
-            question = "I can see this is affecting you deeply. Would you like to talk about what's been weighing on you?"
-        elif dominant_emotion == 'angry':
-            question = "It seems like you're feeling frustrated. What specifically triggered these feelings?"
-        elif dominant_emotion == 'fear':
-            question = "What is it about this situation that feels frightening or overwhelming to you?"
-        elif emotion_data.get('composite_scores', {}).get('engagement_score', 0.5) < 0.3:
-            question = "I notice you've become quieter. Is there something specific you'd rather not discuss, or would it help to take a different approach?"
-        else:
-            question = "How does that make you feel? Can you describe the emotions you're experiencing right now?"
+        if not isinstance(snapshot, EmotionSnapshot):
+            snapshot = EmotionSnapshot.from_dict(snapshot)
+
+        # Rule-based question selection: score thresholds first, then a direct
+        # emotion lookup
+        question = _select_question(
+            snapshot.stress, snapshot.anxiety,
+            snapshot.engagement, snapshot.dominant_emotion
+        )
         
         return {
             'success': True,
             'question': question,
-            'trigger': f"{dominant_emotion} emotion",
+            'trigger': f"{snapshot.dominant_emotion} emotion",
             'confidence': 0.6,
             'method': 'rule-based'
         }
+
+
+# Shared instance: building a QuestionAssistant per request would open a fresh
+# Groq HTTPS connection pool each time, paying a TLS handshake per question
+_assistant = None
+
+
+def get_assistant():
+    """Return the shared QuestionAssistant instance"""
+    global _assistant
+    if _assistant is None:
+        _assistant = QuestionAssistant()
+    return _assistant
@@ -3,13 +3,99 @@ RAG Assistant Service
 Orchestrates the RAG pipeline: retrieval and generation
 Includes PDFs, session notes, and client records
 """
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional
 import google.generativeai as genai
+import hashlib
+import logging
 import os
+import numpy as np
 from datetime import datetime
 from bson.objectid import ObjectId
-from .pdf_processing import PDFProcessor
-from .vector_store import VectorStore
+from pymongo import UpdateOne
+from .pdf_processing import PDFProcessor, Chunk
+from .vector_store import VectorStore, _WORD_RE, _STOPWORDS
+
+logger = logging.getLogger(__name__)
+
+# Semantic response cache: answers are reused when a new query's embedding is
+# this close (cosine) to a previously answered one
+_SEMANTIC_CACHE_THRESHOLD = 0.95
+_SEMANTIC_CACHE_MAX = 256
+
+# Disk-backed exact-match cache for generated answers: survives restarts and
+# answers repeat questions without an LLM call (the in-memory semantic cache
+# handles near-duplicates within a process)
+_LLM_CACHE_DIR = "./.llm_cache"
+
+# Context budget for the generation prompt: roughly 3000 tokens at ~4 chars
+# per token. LLM latency grows with input length, so lowest-ranked chunks are
+# dropped (or trimmed) first rather than sent along in full
+_CONTEXT_CHAR_BUDGET = 12000
+
+# Generation prompt built once at import; only context and query vary per call
+_PROMPT_TMPL = """You are an expert therapy assistant with deep knowledge of psychological treatments, therapeutic techniques, and mental health interventions.
+
+Your role is to provide actionable, evidence-based guidance for therapists working with clients. Always:
+- Give specific, practical recommendations
+- Reference therapeutic approaches (CBT, DBT, psychodynamic, etc.) when relevant
+- Provide concrete techniques, exercises, or interventions
+- Be direct and professional, avoiding generic statements
+- Focus on what the therapist should DO, not just theory
+
+Use ONLY the information provided below to answer. If the context doesn't contain sufficient information, briefly state what's missing rather than giving generic advice.
+
+CONTEXT FROM THERAPY RESOURCES:
+{context}
+
+THERAPIST'S QUESTION: {query}
+
+ANSWER (Be specific, actionable, and practical):"""
+
+def _render_note(client_name: str, session_date: str, note: Dict[str, any]) -> str:
+    """Assemble a note's indexable text, skipping empty optional fields"""
+    parts = [
+        f"Client: {client_name}",
+        f"Session Date: {session_date}",
+        f"Note Type: {note.get('note_type', 'session')}",
+        "",
+        "Content:",
+        note.get('content', ''),
+    ]
+    if note.get('ai_summary'):
+        parts.append(f"\nAI Summary: {note['ai_summary']}")
+    if note.get('action_items'):
+        parts.append(f"\nAction Items: {', '.join(note['action_items'])}")
+    return "\n".join(parts)
+
+
+def _render_client(client: Dict[str, any]) -> str:
+    """Assemble a client profile's indexable text"""
+    created = client.get('created_at')
+    # isoformat()[:10] gives the same YYYY-MM-DD as strftime without the
+    # format-string parse and locale machinery
+    created_str = created.isoformat()[:10] if isinstance(created, datetime) else "Unknown"
+    return "\n".join([
+        f"Client Profile: {client['name']}",
+        f"Email: {client.get('email', 'N/A')}",
+        f"Phone: {client.get('phone', 'N/A')}",
+        f"Date of Birth: {client.get('date_of_birth', 'N/A')}",
+        f"Status: {client.get('status', 'active')}",
+        f"Emergency Contact: {client.get('emergency_contact', 'N/A')}",
+        "",
+        "Notes:",
+        client.get('notes', 'No additional notes'),
+        "",
+        f"Created: {created_str}",
+    ])
+
+
+# Static system message for the Groq fallback, built once
+_GROQ_SYSTEM_MSG = {
+    "role": "system",
+    "content": "You are an expert therapy assistant providing practical, evidence-based guidance to mental health professionals. Always give specific, actionable recommendations based on the provided context."
+}
 
 
 class RAGAssistant:
@@ -18,6 +104,11 @@ class RAGAssistant:
         self.pdf_processor = PDFProcessor(docs_folder)
         self.vector_store = VectorStore()
         self.db = db  # MongoDB database instance
+        self._semantic_cache = []  # list of (normalized query embedding, result dict)
+        self._groq_client = None  # persistent fallback client (keeps its HTTPS pool warm)
+        self._warm_executor = ThreadPoolExecutor(max_workers=1)
+        self._corpus_tokens = set()  # vocabulary of everything indexed this process
+        os.makedirs(_LLM_CACHE_DIR, exist_ok=True)
         
         # Initialize Gemini API
         api_key = os.getenv('GEMINI_API_KEY')
@@ -25,7 +116,7 @@ class RAGAssistant:
             genai.configure(api_key=api_key)
             self.model = genai.GenerativeModel('gemini-2.0-flash-exp')  # Updated model name
         else:
-            print("Warning: GEMINI_API_KEY not found. Generation will fail.")
+            logger.warning("GEMINI_API_KEY not found. Generation will fail.")
             self.model = None
     
     def initialize_from_pdfs(self, chunk_size: int = 1000) -> Dict[str, any]:
@@ -34,7 +125,7 @@ class RAGAssistant:
         This should be called on startup or when new PDFs are added
         """
         try:
-            print("Processing PDFs...")
+            logger.debug("Processing PDFs...")
             chunks = self.pdf_processor.process_all_pdfs(chunk_size=chunk_size)
             
             if not chunks:
@@ -44,8 +135,9 @@ class RAGAssistant:
                     "chunks_processed": 0
                 }
             
-            print(f"Adding {len(chunks)} chunks to vector store...")
+            logger.debug("Adding %d chunks to vector store...", len(chunks))
             self.vector_store.add_documents(chunks)
+            self._absorb_tokens(chunks)
             
             return {
                 "success": True,
@@ -62,7 +154,7 @@ class RAGAssistant:
     def add_pdf(self, pdf_path: str, chunk_size: int = 1000) -> Dict[str, any]:
         """Add a single PDF to the system"""
         try:
-            print(f"Processing PDF: {pdf_path}")
+            logger.debug("Processing PDF: %s", pdf_path)
             chunks = self.pdf_processor.process_pdf(pdf_path, chunk_size=chunk_size)
             
             if not chunks:
@@ -72,8 +164,9 @@ class RAGAssistant:
                     "chunks_processed": 0
                 }
             
-            print(f"Adding {len(chunks)} chunks to vector store...")
+            logger.debug("Adding %d chunks to vector store...", len(chunks))
             self.vector_store.add_documents(chunks)
+            self._absorb_tokens(chunks)
             
             return {
                 "success": True,
@@ -88,84 +181,185 @@ class RAGAssistant:
                 "chunks_processed": 0
             }
     
-    def retrieve_context(self, query: str, n_results: int = 5) -> List[Dict[str, any]]:
+    def _absorb_tokens(self, chunks) -> None:
+        """Fold a batch of chunk texts (or raw strings) into the corpus vocabulary
+
+        Lets query_assistant reject queries that share no keywords with the
+        indexed corpus without paying for embedding, ANN search or the LLM.
+        """
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                text = chunk
+            else:
+                text = chunk['text'] if isinstance(chunk, dict) else chunk.text
+            self._corpus_tokens.update(_WORD_RE.findall(text.lower()))
+
+    def _is_obvious_miss(self, cleaned_query: str) -> bool:
+        """True when no query keyword appears anywhere in the indexed corpus"""
+        if not self._corpus_tokens:
+            return False
+        query_words = set(_WORD_RE.findall(cleaned_query.lower())) - _STOPWORDS
+        return bool(query_words) and not (query_words & self._corpus_tokens)
+
+    def retrieve_context(self, query: str, n_results: int = 5, query_embedding: Optional[List[float]] = None) -> List[Dict[str, any]]:
         """Retrieve relevant context chunks for a query"""
-        results = self.vector_store.query(query, n_results=n_results)
+        results = self.vector_store.query(query, n_results=n_results, query_embedding=query_embedding)
         return results.get("results", [])
+
+    def _normalize_embedding(self, embedding) -> Optional[np.ndarray]:
+        """Return a unit-norm float32 vector, or None for degenerate embeddings"""
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        if norm == 0:
+            return None
+        return vec / norm
+
+    def _semantic_cache_get(self, query_vec: Optional[np.ndarray]) -> Optional[Dict[str, any]]:
+        """Look up a cached answer for a semantically near-identical query"""
+        if query_vec is None or not self._semantic_cache:
+            return None
+        # Cosine similarity against all cached (normalized) query vectors
+        cached_vecs = np.stack([vec for vec, _ in self._semantic_cache])
+        scores = cached_vecs @ query_vec
+        best = int(np.argmax(scores))
+        if scores[best] >= _SEMANTIC_CACHE_THRESHOLD:
+            return self._semantic_cache[best][1]
+        return None
+
+    def _semantic_cache_put(self, query_vec: Optional[np.ndarray], result: Dict[str, any]) -> None:
+        """Store an answer keyed by its query embedding (bounded, FIFO eviction)"""
+        if query_vec is None:
+            return
+        if len(self._semantic_cache) >= _SEMANTIC_CACHE_MAX:
+            self._semantic_cache.pop(0)
+        self._semantic_cache.append((query_vec, result))
     
+    def _warm_llm(self):
+        """Build the fallback Groq client ahead of time
+
+        Run on the warm-up executor at the start of a query so the TLS
+        handshake overlaps vector search instead of adding to generation
+        latency. The Gemini model object is already constructed in __init__.
+        """
+        if self._groq_client is None:
+            groq_api_key = os.getenv('GROQ_API_KEY')
+            if groq_api_key:
+                from groq import Groq
+                self._groq_client = Groq(api_key=groq_api_key)
+        return self._groq_client
+
     def generate_response(self, query: str, context_chunks: List[Dict[str, any]]) -> str:
-        """Generate response using Gemini (primary) or Groq (fallback) with retrieved context"""
-        # Build context from chunks (without source labels - cleaner)
-        context = "\n\n---\n\n".join([chunk['text'] for chunk in context_chunks])
-        
-        print(f"Context length: {len(context)} characters from {len(context_chunks)} chunks")
-        
-        # Create improved prompt for therapy-specific responses
-        prompt = f"""You are an expert therapy assistant with deep knowledge of psychological treatments, therapeutic techniques, and mental health interventions.
+        """Generate the full response text (buffers the streaming generator)"""
+        return "".join(self.generate_response_stream(query, context_chunks))
 
-Your role is to provide actionable, evidence-based guidance for therapists working with clients. Always:
-- Give specific, practical recommendations
-- Reference therapeutic approaches (CBT, DBT, psychodynamic, etc.) when relevant
-- Provide concrete techniques, exercises, or interventions
-- Be direct and professional, avoiding generic statements
-- Focus on what the therapist should DO, not just theory
+    def _llm_cache_path(self, prompt: str) -> str:
+        """Cache file for a prompt (blake2b is fast and 16 bytes is plenty)"""
+        digest = hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()
+        return os.path.join(_LLM_CACHE_DIR, f"{digest}.txt")
 
-Use ONLY the information provided below to answer. If the context doesn't contain sufficient information, briefly state what's missing rather than giving generic advice.
+    def _llm_cache_store(self, cache_path: str, answer: str) -> None:
+        """Persist a generated answer; cache writes must never fail a request"""
+        try:
+            with open(cache_path, 'w', encoding='utf-8') as f:
+                f.write(answer)
+        except OSError as e:
+            logger.warning("Could not write LLM cache entry: %s", e)
 
-CONTEXT FROM THERAPY RESOURCES:
-{context}
+    def generate_response_stream(self, query: str, context_chunks: List[Dict[str, any]]):
+        """Generate response using Gemini (primary) or Groq (fallback) with retrieved context
 
-THERAPIST'S QUESTION: {query}
+        Yields text fragments as the model produces them, so callers can show
+        the first tokens immediately instead of waiting for the full answer.
+        """
+        # Build context from chunks (without source labels - cleaner), capped
+        # at the prompt budget. Chunks arrive in rerank order, so the cap
+        # trims the least relevant text first
+        parts = []
+        remaining = _CONTEXT_CHAR_BUDGET
+        for chunk in context_chunks:
+            text = chunk['text']
+            if len(text) >= remaining:
+                if remaining > 0:
+                    parts.append(text[:remaining])
+                break
+            parts.append(text)
+            remaining -= len(text) + 9  # account for the joiner below
+        context = "\n\n---\n\n".join(parts)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Context length: %d characters from %d chunks", len(context), len(context_chunks))
+
+        # Fill the prebuilt therapy-specific prompt template
+        prompt = _PROMPT_TMPL.format(context=context, query=query)
+
+        # Exact-match disk cache: identical prompts (same question, same
+        # retrieved context) are answered without touching a model, even
+        # across process restarts
+        cache_path = self._llm_cache_path(prompt)
+        try:
+            with open(cache_path, encoding='utf-8') as f:
+                cached_answer = f.read()
+            logger.debug("LLM cache hit")
+            yield cached_answer
+            return
+        except FileNotFoundError:
+            pass
 
-ANSWER (Be specific, actionable, and practical):"""
-        
         # Try Gemini first
         if self.model:
             try:
-                print("Attempting Gemini generation...")
-                response = self.model.generate_content(prompt)
-                print("Gemini generation successful!")
-                return response.text
+                logger.debug("Attempting Gemini generation...")
+                response = self.model.generate_content(prompt, stream=True)
+                pieces = []
+                for chunk in response:
+                    if chunk.text:
+                        pieces.append(chunk.text)
+                        yield chunk.text
+                logger.debug("Gemini generation successful!")
+                self._llm_cache_store(cache_path, "".join(pieces))
+                return
             except Exception as e:
                 error_msg = str(e)
                 if "429" in error_msg or "quota" in error_msg.lower():
-                    print(f"Gemini quota exceeded, falling back to Groq")
+                    logger.warning("Gemini quota exceeded, falling back to Groq")
                 else:
-                    print(f"Gemini error: {e}, falling back to Groq")
-        
-        # Fallback to Groq
-        groq_api_key = os.getenv('GROQ_API_KEY')
-        if groq_api_key:
+                    logger.warning("Gemini error: %s, falling back to Groq", e)
+
+        # Fallback to Groq (reuses the persistent, pre-warmed client)
+        groq_client = self._warm_llm()
+        if groq_client:
             try:
-                print("Attempting Groq generation...")
-                from groq import Groq
-                groq_client = Groq(api_key=groq_api_key)
-                
+                logger.debug("Attempting Groq generation...")
                 response = groq_client.chat.completions.create(
                     model="llama-3.3-70b-versatile",  # Fast and accurate
                     messages=[
-                        {
-                            "role": "system",
-                            "content": "You are an expert therapy assistant providing practical, evidence-based guidance to mental health professionals. Always give specific, actionable recommendations based on the provided context."
-                        },
+                        _GROQ_SYSTEM_MSG,
                         {
                             "role": "user",
                             "content": prompt
                         }
                     ],
                     temperature=0.3,  # Lower temperature for more focused responses
-                    max_tokens=1500  # Allow longer, more detailed answers
+                    max_tokens=1500,  # Allow longer, more detailed answers
+                    stream=True
                 )
-                
-                answer = response.choices[0].message.content
-                print(f"Groq generation successful! Response length: {len(answer)} characters")
-                return answer
+
+                pieces = []
+                for chunk in response:
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        pieces.append(delta)
+                        yield delta
+                logger.debug("Groq generation successful!")
+                self._llm_cache_store(cache_path, "".join(pieces))
+                return
             except Exception as e:
                 error_msg = f"Error generating response with Groq: {str(e)}"
-                print(error_msg)
-                return error_msg
-        
-        return "Error: No AI service available. Please configure GEMINI_API_KEY or GROQ_API_KEY."
+                logger.error(error_msg)
+                yield error_msg
+                return
+
+        yield "Error: No AI service available. Please configure GEMINI_API_KEY or GROQ_API_KEY."
     
     def query_assistant(self, query: str, n_results: int = 5) -> Dict[str, any]:
         """
@@ -175,10 +369,39 @@ ANSWER (Be specific, actionable, and practical):"""
         try:
             # Step 1: Query Preprocessing (basic cleaning)
             cleaned_query = query.strip()
-            print(f"Retrieving context for query: {cleaned_query}")
-            
+            logger.debug("Retrieving context for query: %s", cleaned_query)
+
+            # Keyword prefilter: a query sharing no vocabulary with the
+            # corpus cannot retrieve anything useful, so answer the "nothing
+            # found" case without embedding, search or generation
+            if self._is_obvious_miss(cleaned_query):
+                logger.debug("No keyword overlap with corpus - skipping retrieval")
+                return {
+                    "success": True,
+                    "query": query,
+                    "answer": "I couldn't find any relevant information in the document database to answer your question.",
+                    "sources": [],
+                    "context_used": []
+                }
+
+            # Warm the fallback client in the background so its TLS handshake
+            # overlaps embedding + vector search
+            warm = self._warm_executor.submit(self._warm_llm)
+
+            # Embed once: the same embedding drives the semantic cache lookup
+            # and the vector-store retrieval
+            query_embedding = self.vector_store.generate_embedding(cleaned_query)
+            query_vec = self._normalize_embedding(query_embedding)
+
+            # Semantic cache: near-identical questions skip the whole
+            # retrieve/rerank/generate pipeline
+            cached = self._semantic_cache_get(query_vec)
+            if cached is not None:
+                logger.debug("Semantic cache hit - returning cached answer")
+                return {**cached, "query": query, "cache_hit": True}
+
             # Step 2: Retrieval - Fetch top relevant chunks from vector DB
-            context_chunks = self.retrieve_context(cleaned_query, n_results=n_results)
+            context_chunks = self.retrieve_context(cleaned_query, n_results=n_results, query_embedding=query_embedding)
             
             if not context_chunks:
                 return {
@@ -190,40 +413,128 @@ ANSWER (Be specific, actionable, and practical):"""
                 }
             
             # Step 3: Re-Ranking - Improve relevance with hybrid scoring
-            print(f"Re-ranking {len(context_chunks)} chunks...")
+            logger.debug("Re-ranking %d chunks...", len(context_chunks))
             top_chunks = self.vector_store.rerank_chunks(cleaned_query, context_chunks, top_k=3)
             
             # Step 4: Context Construction - Build prompt with top chunks
-            print(f"Using {len(top_chunks)} chunks for generation")
+            logger.debug("Using %d chunks for generation", len(top_chunks))
             
             # Step 5: LLM Generation - Generate grounded answer
-            print("Generating response...")
+            logger.debug("Generating response...")
+            warm.result()  # connection is ready before we hit the model
             answer = self.generate_response(cleaned_query, top_chunks)
             
             # Step 6: Post-Processing - Extract sources and metadata
-            sources = list(set([chunk["metadata"].get("source", "unknown") for chunk in top_chunks]))
-            
-            return {
-                "success": True,
-                "query": query,
-                "answer": answer,
-                "sources": sources,
-                "context_used": [
-                    {
-                        "text": chunk["text"][:200] + "...",  # Truncate for response
-                        "source": chunk["metadata"].get("source", "unknown"),
-                        "similarity": chunk.get("similarity", 0),
-                        "rerank_score": chunk.get("rerank_score", 0)
-                    }
-                    for chunk in top_chunks
-                ]
-            }
+            result = self._build_result(query, answer, top_chunks)
+
+            self._semantic_cache_put(query_vec, result)
+            return result
         except Exception as e:
             return {
                 "success": False,
                 "query": query,
                 "error": str(e)
             }
+
+    async def query_assistant_async(self, query: str, n_results: int = 5) -> Dict[str, any]:
+        """Async wrapper around query_assistant
+
+        Runs the blocking pipeline on a worker thread so an async caller can
+        asyncio.gather many concurrent queries without tying up the event
+        loop (the LLM and vector-store calls are network-bound).
+        """
+        return await asyncio.to_thread(self.query_assistant, query, n_results)
+
+    def query_assistant_stream(self, query: str, n_results: int = 5):
+        """
+        Streaming variant of query_assistant
+
+        Runs the same retrieve/rerank pipeline, then yields event dicts as the
+        answer is generated so the UI can render tokens as they arrive:
+        {"event": "sources", ...}, {"event": "token", ...}, {"event": "done", ...}
+        """
+        try:
+            cleaned_query = query.strip()
+
+            if self._is_obvious_miss(cleaned_query):
+                answer = "I couldn't find any relevant information in the document database to answer your question."
+                yield {"event": "token", "data": answer}
+                yield {"event": "done", "data": {
+                    "success": True,
+                    "query": query,
+                    "answer": answer,
+                    "sources": [],
+                    "context_used": []
+                }}
+                return
+
+            warm = self._warm_executor.submit(self._warm_llm)
+            query_embedding = self.vector_store.generate_embedding(cleaned_query)
+            query_vec = self._normalize_embedding(query_embedding)
+
+            cached = self._semantic_cache_get(query_vec)
+            if cached is not None:
+                logger.debug("Semantic cache hit - returning cached answer")
+                yield {"event": "sources", "data": cached.get("sources", [])}
+                yield {"event": "token", "data": cached.get("answer", "")}
+                yield {"event": "done", "data": {**cached, "query": query, "cache_hit": True}}
+                return
+
+            context_chunks = self.retrieve_context(cleaned_query, n_results=n_results, query_embedding=query_embedding)
+
+            if not context_chunks:
+                answer = "I couldn't find any relevant information in the document database to answer your question."
+                yield {"event": "token", "data": answer}
+                yield {"event": "done", "data": {
+                    "success": True,
+                    "query": query,
+                    "answer": answer,
+                    "sources": [],
+                    "context_used": []
+                }}
+                return
+
+            top_chunks = self.vector_store.rerank_chunks(cleaned_query, context_chunks, top_k=3)
+            sources = list(dict.fromkeys(chunk["metadata"].get("source", "unknown") for chunk in top_chunks))
+            yield {"event": "sources", "data": sources}
+
+            # Stream tokens out while accumulating the full answer for the
+            # final payload and the semantic cache
+            warm.result()
+            parts = []
+            for fragment in self.generate_response_stream(cleaned_query, top_chunks):
+                parts.append(fragment)
+                yield {"event": "token", "data": fragment}
+
+            result = self._build_result(query, "".join(parts), top_chunks)
+            self._semantic_cache_put(query_vec, result)
+            yield {"event": "done", "data": result}
+        except Exception as e:
+            yield {"event": "error", "data": str(e)}
+
+    def _build_result(self, query: str, answer: str, top_chunks: List[Dict[str, any]]) -> Dict[str, any]:
+        """Assemble the response payload shared by the blocking and streaming paths"""
+        # One pass builds both outputs; the dict dedups sources while keeping
+        # rerank order, so identical queries serialize identically
+        sources = {}
+        context_used = []
+        for chunk in top_chunks:
+            source = chunk["metadata"].get("source", "unknown")
+            sources[source] = None
+            context_used.append({
+                "text": chunk["text"][:200] + "...",  # Truncate for response
+                "source": source,
+                "similarity": chunk.get("similarity", 0),
+                "rerank_score": chunk.get("rerank_score", 0)
+            })
+
+        return {
+            "success": True,
+            "query": query,
+            "answer": answer,
+            "sources": list(sources),
+            "context_used": context_used
+        }
     
     def get_stats(self) -> Dict[str, any]:
         """Get statistics about the RAG system"""
@@ -243,6 +554,42 @@ ANSWER (Be specific, actionable, and practical):"""
                 "message": f"Error clearing database: {str(e)}"
             }
     
+    def _changed_and_stale(self, doc_type: str, therapist_id: str, hashes: Dict[str, str]):
+        """
+        Diff content hashes against the rag_fingerprints collection
+
+        Returns (changed, stale): ids whose content is new or changed since the
+        last indexing run, and previously indexed ids that no longer exist.
+        """
+        stored = {
+            f['doc_id']: f['hash']
+            for f in self.db.rag_fingerprints.find(
+                {'doc_type': doc_type, 'therapist_id': ObjectId(therapist_id)})
+        }
+        changed = [doc_id for doc_id, h in hashes.items() if stored.get(doc_id) != h]
+        stale = [doc_id for doc_id in stored if doc_id not in hashes]
+        return changed, stale
+
+    def _record_fingerprints(self, doc_type: str, therapist_id: str, hashes: Dict[str, str],
+                             changed: List[str], stale: List[str]) -> None:
+        """Persist fingerprints for re-indexed docs and drop stale ones"""
+        if stale:
+            self.db.rag_fingerprints.delete_many({'doc_type': doc_type, 'doc_id': {'$in': stale}})
+        if changed:
+            now = datetime.utcnow()
+            self.db.rag_fingerprints.bulk_write([
+                UpdateOne(
+                    {'doc_type': doc_type, 'doc_id': doc_id},
+                    {'$set': {
+                        'hash': hashes[doc_id],
+                        'therapist_id': ObjectId(therapist_id),
+                        'indexed_at': now
+                    }},
+                    upsert=True
+                )
+                for doc_id in changed
+            ])
+
     def index_notes(self, therapist_id: str, chunk_size: int = 800) -> Dict[str, any]:
         """
         Index all notes for a therapist into the vector store
@@ -251,77 +598,88 @@ ANSWER (Be specific, actionable, and practical):"""
             return {"success": False, "message": "Database not available"}
         
         try:
-            # Fetch all notes for the therapist
-            notes = list(self.db.notes.find({'therapist_id': ObjectId(therapist_id)}))
-            
+            # Fetch notes with their client/session joined server-side: one
+            # aggregation round-trip instead of extra lookups per note
+            notes = list(self.db.notes.aggregate([
+                {"$match": {"therapist_id": ObjectId(therapist_id)}},
+                {"$lookup": {"from": "clients", "localField": "client_id", "foreignField": "_id", "as": "client"}},
+                {"$lookup": {"from": "sessions", "localField": "session_id", "foreignField": "_id", "as": "session"}},
+                {"$project": {
+                    "content": 1,
+                    "ai_summary": 1,
+                    "action_items": 1,
+                    "note_type": 1,
+                    "client_id": 1,
+                    "client_name": {"$arrayElemAt": ["$client.name", 0]},
+                    "session_time": {"$arrayElemAt": ["$session.scheduled_time", 0]}
+                }}
+            ]))
+
             if not notes:
                 return {
                     "success": True,
                     "message": "No notes found to index",
                     "chunks_processed": 0
                 }
-            
-            chunks = []
+
+            # Build the indexable text for every note, then diff content
+            # hashes against the last run so only new/changed notes are
+            # re-embedded
+            contents = {}
+            hashes = {}
             for note in notes:
-                # Get client info for better context
-                client = self.db.clients.find_one({'_id': note['client_id']})
-                client_name = client['name'] if client else "Unknown Client"
-                
-                # Get session info if available
-                session = None
-                session_date = "Unknown Date"
-                if note.get('session_id'):
-                    session = self.db.sessions.find_one({'_id': note['session_id']})
-                    if session and session.get('scheduled_time'):
-                        session_date = session['scheduled_time'].strftime('%Y-%m-%d')
-                
+                client_name = note.get('client_name') or "Unknown Client"
+
+                session_time = note.get('session_time')
+                session_date = session_time.strftime('%Y-%m-%d') if session_time else "Unknown Date"
+
                 # Combine note content
-                note_content = f"""
-Client: {client_name}
-Session Date: {session_date}
-Note Type: {note.get('note_type', 'session')}
-
-Content:
-{note.get('content', '')}
-
-{f"AI Summary: {note.get('ai_summary', '')}" if note.get('ai_summary') else ''}
-{f"Action Items: {', '.join(note.get('action_items', []))}" if note.get('action_items') else ''}
-                """.strip()
-                
+                note_content = _render_note(client_name, session_date, note)
+
+                note_id = str(note['_id'])
+                contents[note_id] = (note, note_content, client_name, session_date)
+                hashes[note_id] = hashlib.blake2b(note_content.encode()).hexdigest()
+
+            changed, stale = self._changed_and_stale('note', therapist_id, hashes)
+
+            chunks = []
+            for note_id in changed:
+                note, note_content, client_name, session_date = contents[note_id]
+
                 # Chunk the note if it's too long
                 if len(note_content) > chunk_size:
                     note_chunks = self.pdf_processor.chunk_text(note_content, chunk_size=chunk_size)
-                    for i, chunk_text in enumerate(note_chunks):
-                        chunks.append({
-                            "text": chunk_text,
-                            "metadata": {
-                                "source": f"Note - {client_name} - {session_date}",
-                                "type": "note",
-                                "client_id": str(note['client_id']),
-                                "note_id": str(note['_id']),
-                                "session_date": session_date,
-                                "chunk_index": i
-                            }
-                        })
                 else:
-                    chunks.append({
-                        "text": note_content,
-                        "metadata": {
-                            "source": f"Note - {client_name} - {session_date}",
-                            "type": "note",
-                            "client_id": str(note['client_id']),
-                            "note_id": str(note['_id']),
-                            "session_date": session_date,
-                            "chunk_index": 0
-                        }
-                    })
-            
-            # Add to vector store
-            self.vector_store.add_documents(chunks)
-            
+                    note_chunks = [note_content]
+
+                for i, chunk_text in enumerate(note_chunks):
+                    chunks.append(Chunk(
+                        text=chunk_text,
+                        source=f"Note - {client_name} - {session_date}",
+                        type="note",
+                        chunk_index=i,
+                        client_id=str(note['client_id']),
+                        note_id=note_id,
+                        session_date=session_date
+                    ))
+
+            # Drop vectors for deleted notes and stale versions of changed
+            # ones, then add the fresh chunks
+            if changed or stale:
+                self.vector_store.delete_where({"note_id": {"$in": changed + stale}})
+            if chunks:
+                self.vector_store.add_documents(chunks)
+            # Vocabulary covers every fetched note, not just re-embedded
+            # ones — after a restart, fingerprint-skipped notes would
+            # otherwise be invisible to the keyword prefilter and queries
+            # about them falsely rejected before reaching the vector store
+            self._absorb_tokens(content for _, content, _, _ in contents.values())
+            self._record_fingerprints('note', therapist_id, hashes, changed, stale)
+
             return {
                 "success": True,
-                "message": f"Indexed {len(notes)} notes into {len(chunks)} chunks",
+                "message": f"Indexed {len(changed)} changed notes into {len(chunks)} chunks "
+                           f"({len(notes) - len(changed)} unchanged)",
                 "notes_processed": len(notes),
                 "chunks_processed": len(chunks)
             }
@@ -350,39 +708,48 @@ Content:
                     "chunks_processed": 0
                 }
             
-            chunks = []
+            # Build each profile, then diff content hashes so unchanged
+            # clients are not re-embedded
+            contents = {}
+            hashes = {}
             for client in clients:
                 # Build comprehensive client record
-                client_info = f"""
-Client Profile: {client['name']}
-Email: {client.get('email', 'N/A')}
-Phone: {client.get('phone', 'N/A')}
-Date of Birth: {client.get('date_of_birth', 'N/A')}
-Status: {client.get('status', 'active')}
-Emergency Contact: {client.get('emergency_contact', 'N/A')}
-
-Notes:
-{client.get('notes', 'No additional notes')}
-
-Created: {client.get('created_at', 'Unknown').strftime('%Y-%m-%d') if isinstance(client.get('created_at'), datetime) else 'Unknown'}
-                """.strip()
-                
-                chunks.append({
-                    "text": client_info,
-                    "metadata": {
-                        "source": f"Client Profile - {client['name']}",
-                        "type": "client",
-                        "client_id": str(client['_id']),
-                        "client_name": client['name']
-                    }
-                })
-            
-            # Add to vector store
-            self.vector_store.add_documents(chunks)
-            
+                client_info = _render_client(client)
+
+                client_id = str(client['_id'])
+                contents[client_id] = (client, client_info)
+                hashes[client_id] = hashlib.blake2b(client_info.encode()).hexdigest()
+
+            changed, stale = self._changed_and_stale('client', therapist_id, hashes)
+
+            chunks = []
+            for client_id in changed:
+                client, client_info = contents[client_id]
+                chunks.append(Chunk(
+                    text=client_info,
+                    source=f"Client Profile - {client['name']}",
+                    type="client",
+                    client_id=client_id,
+                    client_name=client['name']
+                ))
+
+            # Scope by type: note chunks carry a client_id too
+            if changed or stale:
+                self.vector_store.delete_where({"$and": [
+                    {"type": "client"},
+                    {"client_id": {"$in": changed + stale}}
+                ]})
+            if chunks:
+                self.vector_store.add_documents(chunks)
+            # As with notes: absorb every fetched profile so fingerprint-
+            # skipped clients still count toward the keyword prefilter
+            self._absorb_tokens(info for _, info in contents.values())
+            self._record_fingerprints('client', therapist_id, hashes, changed, stale)
+
             return {
                 "success": True,
-                "message": f"Indexed {len(clients)} client records",
+                "message": f"Indexed {len(changed)} changed client records "
+                           f"({len(clients) - len(changed)} unchanged)",
                 "clients_processed": len(clients),
                 "chunks_processed": len(chunks)
             }
@@ -397,11 +764,18 @@ Created: {client.get('created_at', 'Unknown').strftime('%Y-%m-%d') if isinstance
         """
         Initialize RAG system with all data: PDFs, notes, and client records
         """
-        results = {
-            "pdfs": self.initialize_from_pdfs(chunk_size=chunk_size),
-            "notes": self.index_notes(therapist_id, chunk_size=chunk_size),
-            "clients": self.index_clients(therapist_id)
-        }
+        # The three sources are independent; run them concurrently so PDF
+        # chunking overlaps the Mongo-bound note/client indexing
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            pdfs_future = executor.submit(self.initialize_from_pdfs, chunk_size=chunk_size)
+            notes_future = executor.submit(self.index_notes, therapist_id, chunk_size=chunk_size)
+            clients_future = executor.submit(self.index_clients, therapist_id)
+
+            results = {
+                "pdfs": pdfs_future.result(),
+                "notes": notes_future.result(),
+                "clients": clients_future.result()
+            }
         
         total_chunks = (
             results['pdfs'].get('chunks_processed', 0) +
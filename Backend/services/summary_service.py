@@ -3,235 +3,395 @@ Summary Service
 Handles automatic summarization of therapy session transcripts
 Supports Google Gemini, Groq, and OpenAI APIs with automatic fallback
 """
+import asyncio
+import atexit
+import functools
+from collections import deque
+import hashlib
+import json
+import logging
 import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Dict, Optional
 
-class SummaryService:
-    """Service for generating summaries from transcripts"""
-    
-    def __init__(self):
-        """Initialize summary service with available AI provider"""
-        self.provider = os.environ.get('AI_PROVIDER', 'gemini').lower()
-        self.gemini_key = os.environ.get('GEMINI_API_KEY')
-        self.groq_key = os.environ.get('GROQ_API_KEY')
-        self.openai_key = os.environ.get('OPENAI_API_KEY')
-        self.client = None
-        
-        # Initialize based on provider preference
-        if self.provider == 'gemini' and self.gemini_key:
-            try:
-                import google.generativeai as genai
-                genai.configure(api_key=self.gemini_key)
-                # Use Gemini 2.0 Flash - fast and efficient
-                self.client = genai.GenerativeModel('gemini-2.0-flash')
-                self.provider = 'gemini'
-            except ImportError:
-                print("Warning: google-generativeai not installed. Install with: pip install google-generativeai")
-                self.client = None
-        elif self.provider == 'groq' and self.groq_key:
-            try:
-                from groq import Groq
-                self.client = Groq(api_key=self.groq_key)
-                self.provider = 'groq'
-            except ImportError:
-                print("Warning: groq not installed. Install with: pip install groq")
-                self.client = None
-        elif self.provider == 'openai' and self.openai_key:
-            try:
-                from openai import OpenAI
-                self.client = OpenAI(api_key=self.openai_key)
-                self.provider = 'openai'
-            except ImportError:
-                print("Warning: openai not installed. Install with: pip install openai")
-                self.client = None
-        else:
-            # Try fallback priority: Gemini -> Groq
-            if self.gemini_key:
-                try:
-                    import google.generativeai as genai
-                    genai.configure(api_key=self.gemini_key)
-                    self.client = genai.GenerativeModel('gemini-2.0-flash')
-                    self.provider = 'gemini'
-                except:
-                    pass
-            elif self.groq_key:
-                try:
-                    from groq import Groq
-                    self.client = Groq(api_key=self.groq_key)
-                    self.provider = 'groq'
-                except:
-                    pass
-    
-    def is_available(self) -> bool:
-        """Check if summary service is available"""
-        return self.client is not None
-    
-    def get_client_context(self, db, client_id: str, limit: int = 3) -> tuple:
-        """
-        Fetch recent session notes for RAG context
-        
-        Args:
-            db: Database connection
-            client_id: Client's ID
-            limit: Number of recent notes to fetch
-            
-        Returns:
-            Tuple of (context_string, session_count)
-            - context_string: Formatted context with past session summaries
-            - session_count: Number of previous sessions found
-        """
-        try:
-            from bson import ObjectId
-            
-            # Fetch recent notes for this client
-            notes = list(db.notes.find({
-                'client_id': ObjectId(client_id)
-            }).sort('created_at', -1).limit(limit))
-            
-            session_count = len(notes)
-            
-            if session_count == 0:
-                return "", 0
-            
-            context = "\n### PAST SESSION CONTEXT ###\n"
-            context += f"This client has {session_count} previous session(s) recorded:\n\n"
-            
-            for i, note in enumerate(reversed(notes), 1):
-                session_date = note.get('session_date', 'Unknown date')
-                ai_summary = note.get('ai_summary', note.get('content', ''))
-                
-                # Extract key points from summary
-                context += f"Previous Session {i} ({session_date}):\n"
-                # Take first 400 chars of summary for better context
-                summary_excerpt = ai_summary[:400] + "..." if len(ai_summary) > 400 else ai_summary
-                context += f"{summary_excerpt}\n\n"
-            
-            context += "### END PAST SESSION CONTEXT ###\n\n"
-            return context, session_count
-            
-        except Exception as e:
-            print(f"Error fetching client context: {e}")
-            return "", 0
-    
-    def get_cognitive_patterns_context(self, db, client_id: str, limit: int = 3) -> str:
-        """
-        Fetch previously identified cognitive patterns for better pattern tracking
-        
-        Args:
-            db: Database connection
-            client_id: Client's ID
-            limit: Number of recent sessions to analyze
-            
-        Returns:
-            Formatted string with pattern history
-        """
-        try:
-            from bson import ObjectId
-            
-            # Fetch recent notes
-            notes = list(db.notes.find({
-                'client_id': ObjectId(client_id)
-            }).sort('created_at', -1).limit(limit))
-            
-            if not notes:
-                return ""
-            
-            patterns_context = "\n### COGNITIVE PATTERNS HISTORY ###\n"
-            patterns_context += "Previously identified patterns in past sessions:\n\n"
-            
-            pattern_found = False
-            for i, note in enumerate(reversed(notes), 1):
-                session_date = note.get('session_date', 'Unknown')
-                ai_summary = note.get('ai_summary', note.get('content', ''))
-                
-                # Extract cognitive patterns section if present
-                if 'Cognitive Pattern' in ai_summary or 'cognitive pattern' in ai_summary.lower():
-                    # Find the patterns section
-                    lines = ai_summary.split('\n')
-                    capturing = False
-                    pattern_text = []
-                    
-                    for line in lines:
-                        if 'cognitive pattern' in line.lower():
-                            capturing = True
-                            continue
-                        elif capturing and line.strip().startswith('**') and 'homework' in line.lower():
-                            # Next section started (Homework/Action Items)
-                            break
-                        elif capturing and line.strip().startswith('**') and any(x in line.lower() for x in ['initial', 'today', 'progress', 'clinical', 'intervention']):
-                            # Different major section started
-                            break
-                        elif capturing and line.strip():
-                            pattern_text.append(line.strip())
-                    
-                    if pattern_text:
-                        pattern_found = True
-                        patterns_context += f"Session {i} ({session_date}):\n"
-                        patterns_context += '\n'.join(pattern_text[:8]) + "\n\n"  # Limit to 8 lines
-            
-            if not pattern_found:
-                return ""  # Don't include empty context
-            
-            patterns_context += "### END COGNITIVE PATTERNS HISTORY ###\n\n"
-            return patterns_context
-            
-        except Exception as e:
-            print(f"Error fetching cognitive patterns context: {e}")
-            return ""
-    
-    def generate_session_summary(
-        self, 
-        transcript: str, 
-        session_type: str = "individual",
-        client_name: Optional[str] = None,
-        language: str = "en",
-        client_id: Optional[str] = None,
-        db = None
-    ) -> Dict:
-        """
-        Generate a comprehensive summary of a therapy session with RAG context
-        
-        Args:
-            transcript: Full transcript of the session
-            session_type: Type of session (individual, group, etc.)
-            client_name: Name of the client (optional, for personalization)
-            language: Language for the summary ('en' or 'hi')
-            client_id: Client's ID for fetching past context
-            db: Database connection for RAG
-            
-        Returns:
-            Dictionary with summary results
-        """
-        if not self.is_available():
-            return {
-                'success': False,
-                'error': 'Summary service not configured. Please set GEMINI_API_KEY or OPENAI_API_KEY.'
-            }
-        
-        try:
-            # Fetch client context for RAG
-            client_context = ""
-            patterns_context = ""
-            session_count = 0
-            if client_id is not None and db is not None:
-                client_context, session_count = self.get_client_context(db, client_id, limit=3)
-                patterns_context = self.get_cognitive_patterns_context(db, client_id, limit=3)
-                if session_count > 0:
-                    print(f"[RAG] Added context from {session_count} previous session(s)")
-                    if patterns_context:
-                        print(f"[RAG] Added cognitive patterns history for tracking")
-                else:
-                    print(f"[RAG] First session for this client - establishing baseline")
-            
-            # Note: Transcripts may contain mixed Hindi/English (Hinglish)
-            # Always generate summaries in English for consistency
-            print(f"[SUMMARY] Generating summary in English (transcript may contain Hindi/English mix)")
-            
-            # Always use English prompts - AI will understand bilingual transcripts
-            # Adjust based on session count
-            if session_count == 0:
-                # First session - establish baseline
-                system_prompt = """You are an experienced clinical psychologist writing notes for an INITIAL session.
+import numpy as np
+from bson.objectid import ObjectId
+
+logger = logging.getLogger(__name__)
+
+
+# Transcript compression: verbal filler and repeated back-channel turns carry
+# no clinical content but inflate input-token count on every LLM call.
+# "like"/"sort of" are left alone — in a therapy transcript they are often
+# load-bearing ("I don't like...", "I sort of shut down")
+# Longer alternatives precede their prefixes (uh-huh before uh+), or the
+# engine matches the prefix and leaves "-huh" artifacts behind
+_FILLER_RE = re.compile(r"\b(?:uh-huh|mm+-?hmm|um+|uh+|er+|ah+|you know)\b[,.]?\s*", re.IGNORECASE)
+_SPACES_RE = re.compile(r'[ \t]+')
+
+
+def _compress_transcript(transcript: str) -> str:
+    """
+    Strip filler words, collapse whitespace and drop consecutive duplicate
+    lines before a transcript is sent to a model
+
+    Cuts input tokens (cost and prefill latency) without touching clinical
+    content.
+    """
+    text = _FILLER_RE.sub('', transcript)
+    lines = []
+    prev = None
+    for line in text.splitlines():
+        line = _SPACES_RE.sub(' ', line).strip()
+        if not line or line == prev:
+            continue
+        lines.append(line)
+        prev = line
+    return '\n'.join(lines)
+
+
+# Token-budget shaping for the auxiliary prompts (quick summary, key
+# points): those calls produce short outputs, so past a point extra
+# transcript only adds cost and prefill latency. Char budget at roughly 4
+# chars/token; greetings/goals and action items cluster at the start and
+# end of a session, so both edges are kept and the middle elided.
+_SHAPE_BUDGET_CHARS = int(os.getenv('TRANSCRIPT_CHAR_BUDGET', '32000'))
+
+
+def _shape_transcript(transcript: str, max_chars: int = _SHAPE_BUDGET_CHARS) -> str:
+    """Cap a transcript at max_chars, keeping the first and last 40%"""
+    if len(transcript) <= max_chars:
+        return transcript
+    keep = int(max_chars * 0.4)
+    elided = len(transcript) - 2 * keep
+    return (
+        transcript[:keep]
+        + f"\n[... ~{elided} characters of the session elided ...]\n"
+        + transcript[-keep:]
+    )
+
+
+# Map-reduce summarization for very long sessions: windows are split on
+# speaker-turn boundaries, condensed in parallel on the cheap model tier,
+# then the condensed parts feed the normal notes prompt
+_MAPREDUCE_THRESHOLD_CHARS = 24000
+_MAPREDUCE_CHUNK_CHARS = 8000
+_SPEAKER_TURN_RE = re.compile(r'\n(?=(?:THERAPIST|CLIENT)\s*:)', re.IGNORECASE)
+
+
+def _chunk_transcript(transcript: str, max_chars: int = _MAPREDUCE_CHUNK_CHARS) -> list:
+    """Split a transcript into windows of whole speaker turns"""
+    turns = _SPEAKER_TURN_RE.split(transcript)
+    chunks = []
+    current, used = [], 0
+    for turn in turns:
+        if current and used + len(turn) > max_chars:
+            chunks.append('\n'.join(current))
+            current, used = [], 0
+        current.append(turn)
+        used += len(turn) + 1
+    if current:
+        chunks.append('\n'.join(current))
+    return chunks
+
+
+# Client-context TTL cache, shared across instances (the routes build a
+# fresh SummaryService per auto-note job). 60s keeps follow-up artifacts for
+# one session from re-fetching the same notes while staying fresh enough
+# that a newly saved note shows up almost immediately
+_CTX_CACHE = {}
+_CTX_CACHE_MAX = 1024
+_CTX_CACHE_TTL = 60.0
+_CTX_CACHE_LOCK = threading.Lock()
+
+# Providers already warmed up this process — the warm-up ping is a real
+# billable request, so it fires at most once per provider, not per instance
+_WARMED_PROVIDERS = set()
+_WARMED_LOCK = threading.Lock()
+
+
+def _ctx_cache_get(key: str):
+    with _CTX_CACHE_LOCK:
+        entry = _CTX_CACHE.get(key)
+        if entry is not None and time.monotonic() < entry[0]:
+            return entry[1]
+    return None
+
+
+def _ctx_cache_put(key: str, value) -> None:
+    with _CTX_CACHE_LOCK:
+        if len(_CTX_CACHE) >= _CTX_CACHE_MAX:
+            _CTX_CACHE.pop(next(iter(_CTX_CACHE)))
+        _CTX_CACHE[key] = (time.monotonic() + _CTX_CACHE_TTL, value)
+
+
+def _build_client_context(notes: list) -> tuple:
+    """
+    Format the past-session context block from a fetched note bundle
+
+    Pure function over the bundle returned by _fetch_context_bundle; returns
+    (context_string, session_count), with ("", 0) for a first session.
+    """
+    session_count = len(notes)
+    if session_count == 0:
+        return "", 0
+
+    # Build via append + join: += reallocates the whole string each
+    # pass, which turns O(N^2) if the limit ever grows
+    parts = [
+        "\n### PAST SESSION CONTEXT ###\n",
+        f"This client has {session_count} previous session(s) recorded:\n\n"
+    ]
+
+    for i, note in enumerate(notes, 1):
+        session_date = note.get('session_date', 'Unknown date')
+        excerpt = note.get('excerpt', '')
+
+        # Take first 400 chars of summary for better context
+        summary_excerpt = excerpt[:400] + "..." if len(excerpt) > 400 else excerpt
+        parts.append(f"Previous Session {i} ({session_date}):\n{summary_excerpt}\n\n")
+
+    parts.append("### END PAST SESSION CONTEXT ###\n\n")
+    return ''.join(parts), session_count
+
+
+# Captures the "**Cognitive Patterns**" section of a note up to the next
+# known major header (or end of text). One C-level regex pass replaces the
+# old per-line state machine and its repeated .lower() allocations.
+_PATTERN_SECTION_RE = re.compile(
+    r'(?is)\*\*\s*cognitive patterns?[^*]*?\*\*'
+    r'(.*?)'
+    r'(?=\*\*\s*(?:homework|initial|today|progress|clinical|intervention)\b|\Z)'
+)
+
+
+def _extract_patterns(notes: list) -> str:
+    """
+    Format the cognitive-patterns history block from a fetched note bundle
+
+    Pure function over the bundle returned by _fetch_context_bundle; returns
+    "" when no note carries a patterns section.
+    """
+    if not notes:
+        return ""
+
+    pattern_parts = [
+        "\n### COGNITIVE PATTERNS HISTORY ###\n",
+        "Previously identified patterns in past sessions:\n\n"
+    ]
+
+    pattern_found = False
+    for i, note in enumerate(notes, 1):
+        session_date = note.get('session_date', 'Unknown')
+        ai_summary = note.get('summary', '')
+
+        # Extract cognitive patterns section if present
+        m = _PATTERN_SECTION_RE.search(ai_summary)
+        if m:
+            # Limit to 8 non-blank lines
+            pattern_text = [
+                line.strip() for line in m.group(1).splitlines() if line.strip()
+            ][:8]
+            if pattern_text:
+                pattern_found = True
+                pattern_parts.append(
+                    f"Session {i} ({session_date}):\n" + '\n'.join(pattern_text) + "\n\n"
+                )
+
+    if not pattern_found:
+        return ""  # Don't include empty context
+
+    pattern_parts.append("### END COGNITIVE PATTERNS HISTORY ###\n\n")
+    return ''.join(pattern_parts)
+
+
+# Selective invocation: transcripts too short or too repetitive to contain
+# real clinical content get a local extractive summary instead of an LLM call
+_MIN_TRANSCRIPT_TOKENS = 80
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+
+
+def _extractive_fallback(transcript: str, max_sentences: int = 5) -> str:
+    """Local stand-in summary: the longest sentences of the transcript"""
+    sentences = [s.strip() for s in _SENTENCE_SPLIT_RE.split(transcript) if s.strip()]
+    sentences.sort(key=len, reverse=True)
+    return ' '.join(sentences[:max_sentences])
+
+
+# Exact-match response cache: identical (method, provider, params, transcript)
+# requests — retries, polling UIs — become a dict lookup. Entries are also
+# persisted file-per-key so repeats survive a process restart
+_EXACT_CACHE_MAX = 512
+_SUMMARY_CACHE_DIR = "./.summary_cache"
+_SUMMARY_CACHE_TTL = 86400 * 7  # seconds
+
+
+def _exact_key(*parts) -> str:
+    """Stable cache key over the method name, provider, params and transcript"""
+    return hashlib.sha256('|'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+# Semantic response cache: a transcript whose bag-of-words vector is this
+# close (cosine) to a previously summarized one reuses that result
+_SEMANTIC_CACHE_THRESHOLD = 0.95
+_SEMANTIC_CACHE_MAX = 64
+
+
+def _transcript_vector(text: str):
+    """
+    Cheap local bag-of-words embedding of a transcript
+
+    Word-hash counts folded into a fixed 768-dim vector, unit-normalized —
+    the same style of hash embedding the vector store uses as its local
+    fallback. Enough to recognize retries and near-identical transcripts
+    without shipping an embedding model.
+    """
+    words = text.lower().split()
+    if not words:
+        return None
+    vec = np.zeros(768, dtype=np.float32)
+    for word in words:
+        hash_val = hash(word)
+        vec[hash_val % 768] += 1.0
+        vec[(hash_val // 768) % 768] += 0.5
+    norm = np.linalg.norm(vec)
+    if norm == 0:
+        return None
+    return vec / norm
+
+
+class _TokenBucket:
+    """
+    Client-side token-bucket rate limiter for outbound provider calls
+
+    A burst of concurrent summary jobs would otherwise trip provider 429s
+    and land everything in the retry/backoff path; refilling against a
+    monotonic clock keeps requests at or under the configured rate.
+    """
+
+    def __init__(self, rate: float):
+        self.rate = max(rate, 0.1)  # requests per second
+        self.capacity = self.rate
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a request token is available"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait = (1.0 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class CircuitOpenError(Exception):
+    """Raised when the provider circuit breaker is short-circuiting calls"""
+
+
+class CircuitBreaker:
+    """
+    Fail fast during provider outages
+
+    After fail_threshold consecutive failures the breaker opens and further
+    calls raise CircuitOpenError immediately instead of each waiting out a
+    full request timeout. Once reset_seconds have passed, one trial call is
+    let through (half-open); success closes the breaker, failure re-opens it.
+    """
+
+    def __init__(self, fail_threshold: int = 5, reset_seconds: float = 30.0):
+        self.fail_threshold = fail_threshold
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at = None
+        self._lock = threading.Lock()
+
+    def check(self) -> None:
+        """Raise CircuitOpenError if calls should be short-circuited"""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if time.monotonic() - self._opened_at < self.reset_seconds:
+                raise CircuitOpenError(
+                    f"Provider circuit open after {self._failures} consecutive failures; "
+                    f"retrying after {self.reset_seconds:.0f}s"
+                )
+            # Reset window elapsed: let one trial call through (half-open)
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.fail_threshold:
+                self._opened_at = time.monotonic()
+
+
+def _is_retryable_error(exc: Exception) -> bool:
+    """True for transient provider failures worth retrying (429/5xx/timeouts)"""
+    status = getattr(exc, 'status_code', None)
+    if status in (408, 429, 500, 502, 503, 504):
+        return True
+    msg = str(exc).lower()
+    return any(token in msg for token in (
+        '429', 'rate limit', 'resource exhausted', 'quota',
+        'timeout', 'timed out', 'deadline',
+        'connection', 'unavailable', '500', '502', '503'
+    ))
+
+
+# JSON schema for key-point extraction
+_KEY_POINTS_FORMAT = """{
+    "main_topics": ["topic1", "topic2", ...],
+    "emotions_identified": ["emotion1", "emotion2", ...],
+    "action_items": ["action1", "action2", ...],
+    "progress_notes": "brief progress note",
+    "next_session_focus": "suggested focus areas"
+}"""
+
+# JSON schema for the combined one-call report
+_FULL_REPORT_FORMAT = """{
+    "clinical_notes": "the full clinical notes in markdown, following the structure described above",
+    "quick_summary": "a brief summary of the session in 200 words or less",
+    "key_points": {
+        "main_topics": ["topic1", "topic2"],
+        "emotions_identified": ["emotion1", "emotion2"],
+        "action_items": ["action1", "action2"],
+        "progress_notes": "brief progress note",
+        "next_session_focus": "suggested focus areas"
+    }
+}"""
+
+
+# Matches a fenced JSON object anywhere in a model response, tolerating a
+# prose prefix/suffix around the fence
+_JSON_FENCE = re.compile(r'```(?:json)?\s*(\{.*?\})\s*```', re.S | re.IGNORECASE)
+
+
+def _strip_json_fences(text: str) -> str:
+    """Extract the JSON payload from a possibly fenced model response"""
+    match = _JSON_FENCE.search(text)
+    if match:
+        return match.group(1)
+    return text.strip()
+
+
+# Clinical-notes system prompts, built once at import. Keeping these
+# byte-identical across requests also lets provider-side prompt caching
+# recognize the static prefix
+_FIRST_SESSION_SYSTEM_PROMPT = """You are an experienced clinical psychologist writing notes for an INITIAL session.
 This is the FIRST session with this client - establish a comprehensive baseline assessment.
 
 IMPORTANT: 
@@ -277,10 +437,12 @@ List ONLY patterns that are clearly evident in the transcript with brief example
 
 Keep notes factual and professional. Base everything ONLY on what's in the transcript.
 Use clear, direct English language suitable for clinical records. Total length: 400-650 words."""
-            else:
-                # Subsequent sessions - compare and track progress
-                system_prompt = f"""You are an experienced clinical psychologist writing notes for a FOLLOW-UP session.
-This is session #{session_count + 1} with this client - track progress, changes, and patterns from previous sessions.
+
+# Fully static (the session number lives in the user message) so the bytes
+# never drift and provider prefix caching can reuse the tokenized prompt
+_FOLLOWUP_SYSTEM_PROMPT = """You are an experienced clinical psychologist writing notes for a FOLLOW-UP session.
+This is a follow-up session with this client - track progress, changes, and patterns from previous sessions.
+The session number is stated in the user message.
 
 IMPORTANT:
 - The transcript is labeled with "THERAPIST:" and "CLIENT:" to clearly identify who is speaking
@@ -296,244 +458,996 @@ Create CONCISE but COMPLETE clinical notes following this structure:
 - Any new problems or recurring themes from CLIENT
 - Updates from CLIENT about last session
 
-**Progress & Changes Since Last Session:**
-⭐ CRITICAL: Compare CLIENT's current state against previous sessions and highlight:
-- Improvements and positive changes observed in CLIENT
-- Lack of progress or new challenges for CLIENT
-- Patterns noticed in CLIENT's behavior or outlook
-- CLIENT's homework/action item completion and outcomes
-- Evolution of CLIENT's insight over time
+**Progress & Changes Since Last Session:**
+⭐ CRITICAL: Compare CLIENT's current state against previous sessions and highlight:
+- Improvements and positive changes observed in CLIENT
+- Lack of progress or new challenges for CLIENT
+- Patterns noticed in CLIENT's behavior or outlook
+- CLIENT's homework/action item completion and outcomes
+- Evolution of CLIENT's insight over time
+
+**Clinical Observations:**
+- CLIENT's mood, affect, and emotional state during session
+- Changes or consistency in CLIENT's behavior patterns
+- CLIENT's level of engagement and motivation
+
+**Today's Interventions:**
+- Therapeutic approaches or techniques used by THERAPIST
+- Key insights or breakthroughs achieved by CLIENT
+- CLIENT's response to THERAPIST's interventions
+
+**Cognitive Patterns Identified:**
+Analyze the CLIENT's statements in today's transcript for these specific patterns:
+- Self-blame: CLIENT blaming themselves excessively for outcomes
+- Avoidance: CLIENT avoiding thoughts, feelings, or situations
+- All-or-nothing thinking: CLIENT viewing situations in black-and-white extremes
+- Depressive language: CLIENT's expressions of hopelessness, worthlessness, or helplessness
+- Catastrophizing: CLIENT expecting worst-case scenarios or magnifying problems
+
+⭐ IMPORTANT - If pattern history is provided below, use it to:
+- Compare current patterns in CLIENT to previous sessions
+- Note if CLIENT's patterns are INCREASING, DECREASING, or STABLE
+- Identify NEW patterns in CLIENT not seen before
+- Highlight patterns in CLIENT that have RESOLVED or improved
+
+List ONLY patterns that are clearly evident in the CLIENT's statements today with brief examples.
+Note changes in frequency or intensity compared to previous sessions when history is available.
+
+**Homework & Next Steps:**
+- New assignments and skills for CLIENT to practice
+- Specific goals for CLIENT for next session
+
+Keep notes factual with CLEAR distinction between CLIENT and THERAPIST roles.
+Focus on CLIENT's presentation, progress, and patterns - not the therapist's.
+Base everything on transcript and context provided. Write ENTIRELY IN ENGLISH. Total length: 400-650 words."""
+
+
+# User-prompt boilerplate, built once at import. The transcript — by far the
+# largest piece — is concatenated around these rather than interpolated, so
+# it is never re-scanned by a format pass
+_FIRST_SESSION_USER_PREFIX_TMPL = """This is the FIRST session with {client_name}.
+Create a comprehensive baseline assessment that will form the foundation for future sessions.
+
+Session Type: {session_type}
+
+TRANSCRIPT (with clear speaker labels - THERAPIST: and CLIENT:):
+"""
+
+_FIRST_SESSION_USER_SUFFIX = """
+
+CRITICAL REMINDERS:
+- Lines starting with "CLIENT:" show what the CLIENT said
+- Lines starting with "THERAPIST:" show what the THERAPIST said
+- Document the CLIENT's presenting problems, not the therapist's questions
+- Focus your assessment on the CLIENT's statements, behaviors, and patterns
+
+Generate detailed initial assessment notes based only on what was discussed.
+Establish clear baseline for future progress tracking.
+WRITE YOUR ENTIRE RESPONSE IN ENGLISH."""
+
+_FOLLOWUP_USER_PREFIX_TMPL = """{context}This is SESSION #{session_number} with {client_name}.
+
+Session Type: {session_type}
+
+TODAY'S TRANSCRIPT (with clear speaker labels - THERAPIST: and CLIENT:):
+"""
+
+_FOLLOWUP_USER_SUFFIX = """
+
+CRITICAL REMINDERS:
+- Lines starting with "CLIENT:" show what the CLIENT said
+- Lines starting with "THERAPIST:" show what the THERAPIST said
+- Document the CLIENT's problems and progress, not the therapist's interventions
+- Focus on CLIENT's statements when identifying cognitive patterns
+
+Generate clinical notes using past session context AND cognitive patterns history provided above.
+Specifically highlight:
+- What has IMPROVED? (progress, positive changes, resolved patterns)
+- What has WORSENED or stayed STAGNANT? (setbacks, challenges, persistent patterns)
+- What PATTERNS are emerging? (recurring themes, behaviors, new patterns)
+- How is the client's UNDERSTANDING evolving? (insight development)
+- How have COGNITIVE PATTERNS changed? (compare to history when available)
+
+WRITE YOUR ENTIRE RESPONSE IN ENGLISH."""
+
+@functools.lru_cache(maxsize=4)
+def _build_client(provider: str, key: str):
+    """
+    Construct and memoize one SDK client per (provider, key)
+
+    The routes build a fresh SummaryService per auto-note job; memoizing
+    here means SDK configuration and the HTTP connection pool are paid once
+    per process instead of once per instantiation. Imports stay inside so a
+    process that never summarises still skips them entirely.
+    """
+    if provider == 'gemini':
+        try:
+            import google.generativeai as genai
+        except ImportError:
+            logger.warning("google-generativeai not installed. Install with: pip install google-generativeai")
+            return None
+        genai.configure(api_key=key)
+        # Use Gemini 2.0 Flash - fast and efficient
+        return genai.GenerativeModel('gemini-2.0-flash')
+    if provider == 'groq':
+        try:
+            from groq import Groq
+        except ImportError:
+            logger.warning("groq not installed. Install with: pip install groq")
+            return None
+        return Groq(api_key=key)
+    if provider == 'openai':
+        try:
+            import httpx
+            from openai import OpenAI
+        except ImportError:
+            logger.warning("openai not installed. Install with: pip install openai")
+            return None
+        # Pooled connections with keep-alive skip the TLS handshake on warm
+        # calls, and explicit timeouts bound how long a stuck connection can
+        # hang a request. SDK retries are disabled; _call_with_retry owns
+        # that. The pool lives for the process and is closed at exit
+        http = httpx.Client(
+            limits=httpx.Limits(
+                max_keepalive_connections=20,
+                max_connections=40,
+                keepalive_expiry=60
+            ),
+            timeout=httpx.Timeout(connect=5.0, read=120.0, write=10.0, pool=5.0)
+        )
+        atexit.register(http.close)
+        return OpenAI(api_key=key, http_client=http, max_retries=0)
+    return None
+
+
+# Model used for each provider
+_PROVIDER_MODELS = {
+    'gemini': 'gemini-2.0-flash',
+    'groq': 'llama-3.3-70b-versatile',
+    'openai': 'gpt-4o-mini'
+}
+
+# Model routing tiers per provider: (short, standard, long). Short sessions
+# go to the cheapest model that handles them, very long ones to a larger-
+# context model. Thresholds are in characters (~4 chars per token)
+_MODEL_TIERS = {
+    'gemini': ('gemini-2.0-flash-lite', 'gemini-2.0-flash', 'gemini-1.5-pro'),
+    'groq': ('llama-3.1-8b-instant', 'llama-3.3-70b-versatile', 'llama-3.3-70b-versatile'),
+    'openai': ('gpt-4o-mini', 'gpt-4o-mini', 'gpt-4o')
+}
+_SHORT_TRANSCRIPT_CHARS = 6000
+_LONG_TRANSCRIPT_CHARS = 32000
+
+# Transcript characters packed into one batched summary call (~20k tokens)
+_BATCH_PROMPT_CHAR_BUDGET = 80000
+
+
+class SummaryService:
+    """Service for generating summaries from transcripts"""
+    
+    def __init__(self):
+        """Initialize summary service with available AI provider"""
+        self.provider = os.environ.get('AI_PROVIDER', 'gemini').lower()
+        self.gemini_key = os.environ.get('GEMINI_API_KEY')
+        self.groq_key = os.environ.get('GROQ_API_KEY')
+        self.openai_key = os.environ.get('OPENAI_API_KEY')
+        self.client = None
+        self._client_ready = False
+        self._semantic_cache = []  # list of (method key, transcript vector, result)
+        self._exact_cache = {}  # sha256 key -> result dict
+        self._inflight = {}  # sha256 key -> Future for an in-progress call
+        self._inflight_lock = threading.Lock()
+        self._cb = CircuitBreaker(fail_threshold=5, reset_seconds=30.0)
+        # Auxiliary calls (quick summary, key points) always use the cheap
+        # tier; QUICK_MODEL pins them to a specific model instead
+        self.quick_model = os.environ.get('QUICK_MODEL')
+        # SUMMARY_CACHE_DISABLED=1 turns off both response caches (for A/B runs)
+        self._cache_disabled = os.environ.get('SUMMARY_CACHE_DISABLED', '').lower() in ('1', 'true', 'yes')
+        # Match SUMMARY_RPS to the provider tier (e.g. 500 req/min -> ~8)
+        self._limiter = _TokenBucket(float(os.environ.get('SUMMARY_RPS', '5')))
+
+        # Resolve which provider will serve requests, but don't import its
+        # SDK yet — a worker that never summarises anything shouldn't pay
+        # for google.generativeai's protobuf/grpc import chain at startup.
+        # Fallback priority when the preferred provider has no key: Gemini -> Groq
+        if self.provider == 'gemini' and self.gemini_key:
+            pass
+        elif self.provider == 'groq' and self.groq_key:
+            pass
+        elif self.provider == 'openai' and self.openai_key:
+            pass
+        elif self.gemini_key:
+            self.provider = 'gemini'
+        elif self.groq_key:
+            self.provider = 'groq'
+        else:
+            self.provider = None
+
+        # Provider dispatch as a method table: Groq speaks the OpenAI chat
+        # API, so everything that isn't Gemini goes down the OpenAI path
+        self._complete = {'gemini': self._gen_gemini}.get(self.provider, self._gen_openai)
+
+        # Pre-warm DNS/TLS (and the SDK import) in the background so the
+        # first real summary skips the cold-start cost. Once per provider
+        # per process — the routes build a fresh service per job, and each
+        # warm-up is a real billable request. SUMMARY_WARMUP=0 disables,
+        # e.g. for one-shot scripts
+        if self.provider is not None and os.environ.get('SUMMARY_WARMUP', '1') == '1':
+            with _WARMED_LOCK:
+                first = self.provider not in _WARMED_PROVIDERS
+                _WARMED_PROVIDERS.add(self.provider)
+            if first:
+                threading.Thread(target=self._warmup, daemon=True).start()
+
+    def _warmup(self) -> None:
+        """Issue a tiny request so the first real call hits warm paths"""
+        try:
+            client = self._ensure_client()
+            if client is None:
+                return
+
+            def _ping():
+                if self.provider == 'gemini':
+                    return client.generate_content('hi', generation_config={'max_output_tokens': 1})
+                return client.chat.completions.create(
+                    model=_MODEL_TIERS[self.provider][0],
+                    messages=[{'role': 'user', 'content': 'hi'}],
+                    max_tokens=1
+                )
+
+            # Through the limiter/breaker like any other call, so the
+            # warm-up can't jump the token bucket or mask an open circuit
+            self._call_with_retry(_ping, max_attempts=1)
+        except Exception:
+            pass  # warm-up is best-effort
+
+    def _ensure_client(self):
+        """Bind the provider's (memoized) SDK client on first use"""
+        if self._client_ready:
+            return self.client
+        self._client_ready = True
+
+        if self.provider is not None:
+            key = {
+                'gemini': self.gemini_key,
+                'groq': self.groq_key,
+                'openai': self.openai_key
+            }[self.provider]
+            self.client = _build_client(self.provider, key)
+
+        return self.client
+
+    def is_available(self) -> bool:
+        """Check if summary service is available"""
+        if self._client_ready:
+            return self.client is not None
+        return self.provider is not None
+
+    def close(self) -> None:
+        """Kept for API compatibility; the shared HTTP pool closes at process exit"""
+        self.client = None
+        self._client_ready = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+    
+    def _fetch_context_bundle(self, db, client_id: str, limit: int = 3) -> list:
+        """
+        Fetch the recent notes both context builders need, in one round-trip
+
+        The past-session context and the cognitive-patterns history read the
+        SAME notes, so one aggregation returns both the truncated excerpt and
+        the full summary per note and each builder reuses the list in memory.
+
+        Returns:
+            List of note dicts (oldest-first) with session_date, excerpt and
+            summary fields; empty list on error or for a first session.
+        """
+        cache_key = f"bundle:{client_id}:{limit}"
+        cached = _ctx_cache_get(cache_key)
+        if cached is not None:
+            return cached
+
+        try:
+            # One aggregation does the match/sort/limit server-side (covered
+            # by the (client_id, created_at) index). The excerpt is truncated
+            # there too ($substrCP is codepoint-safe; 401 chars so the ">400"
+            # check downstream still fires), while the full summary also comes
+            # back because the pattern section can sit anywhere in the note.
+            cursor = db.notes.aggregate([
+                {'$match': {'client_id': ObjectId(client_id)}},
+                {'$sort': {'created_at': -1}},
+                {'$limit': limit},
+                {'$project': {
+                    '_id': 0,
+                    'session_date': 1,
+                    'excerpt': {'$substrCP': [
+                        {'$ifNull': ['$ai_summary', {'$ifNull': ['$content', '']}]},
+                        0, 401
+                    ]},
+                    'summary': {'$ifNull': ['$ai_summary', {'$ifNull': ['$content', '']}]}
+                }}
+            ])
+            # Flip newest-first to oldest-first in the same pass over the
+            # cursor instead of materializing a list and reversing
+            notes = deque(maxlen=limit)
+            for note in cursor:
+                notes.appendleft(note)
+
+            bundle = list(notes)
+            _ctx_cache_put(cache_key, bundle)
+            return bundle
+
+        except Exception as e:
+            logger.error("Error fetching client context bundle: %s", e)
+            return []
+
+    def get_client_context(self, db, client_id: str, limit: int = 3) -> tuple:
+        """
+        Fetch recent session notes for RAG context
+
+        Args:
+            db: Database connection
+            client_id: Client's ID
+            limit: Number of recent notes to fetch
+
+        Returns:
+            Tuple of (context_string, session_count)
+            - context_string: Formatted context with past session summaries
+            - session_count: Number of previous sessions found
+        """
+        notes = self._fetch_context_bundle(db, client_id, limit)
+        return _build_client_context(notes)
+
+    def get_cognitive_patterns_context(self, db, client_id: str, limit: int = 3) -> str:
+        """
+        Fetch previously identified cognitive patterns for better pattern tracking
+
+        Args:
+            db: Database connection
+            client_id: Client's ID
+            limit: Number of recent sessions to analyze
+
+        Returns:
+            Formatted string with pattern history
+        """
+        notes = self._fetch_context_bundle(db, client_id, limit)
+        return _extract_patterns(notes)
+
+    @staticmethod
+    def invalidate_client(client_id) -> None:
+        """Drop cached context for a client (call after saving a new note)"""
+        prefix = f"bundle:{client_id}:"
+        with _CTX_CACHE_LOCK:
+            for key in [k for k in _CTX_CACHE if k.startswith(prefix)]:
+                del _CTX_CACHE[key]
+
+    def _gen_gemini(self, prompt: str, model: str, system: Optional[str] = None,
+                    json_mode: bool = False, temperature: float = 0.7,
+                    max_tokens: Optional[int] = None) -> str:
+        """Non-streaming completion via Gemini (temperature/max_tokens unused:
+        these call sites have always run Gemini on its defaults)"""
+        if system:
+            prompt = f"{system}\n\n{prompt}"
+        client = self._client_for('gemini', self.client, model)
+        if json_mode:
+            response = self._call_with_retry(lambda: client.generate_content(
+                prompt,
+                generation_config={"response_mime_type": "application/json"}
+            ))
+        else:
+            response = self._call_with_retry(lambda: client.generate_content(prompt))
+        return response.text
+
+    def _gen_openai(self, prompt: str, model: str, system: Optional[str] = None,
+                    json_mode: bool = False, temperature: float = 0.7,
+                    max_tokens: Optional[int] = None) -> str:
+        """Non-streaming completion via the OpenAI-compatible API (Groq/OpenAI)"""
+        messages = [{"role": "system", "content": system}] if system else []
+        messages.append({"role": "user", "content": prompt})
+        kwargs = {}
+        if json_mode:
+            kwargs['response_format'] = {"type": "json_object"}
+        if max_tokens is not None:
+            kwargs['max_tokens'] = max_tokens
+        response = self._call_with_retry(lambda: self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            **kwargs
+        ))
+        return response.choices[0].message.content
+
+    def _summarize_chunk(self, chunk: str) -> str:
+        """Condense one transcript window on the cheap model tier"""
+        prompt = (
+            "Condense this portion of a therapy-session transcript into detailed "
+            "notes. Preserve who said what, clinically relevant statements, "
+            "emotions expressed, and any commitments or action items.\n\n" + chunk
+        )
+        try:
+            return self._complete(
+                prompt, _MODEL_TIERS[self.provider][0],
+                temperature=0.3, max_tokens=600
+            )
+        except Exception as e:
+            # A failed window shouldn't sink the whole summary; fall back to
+            # the raw (truncated) text for this part
+            logger.warning("Chunk condensation failed (%s); using raw excerpt", e)
+            return chunk[:2000]
+
+    def _map_reduce_transcript(self, transcript: str) -> str:
+        """
+        Condense a very long transcript via parallel windowed summaries
+
+        Prefill cost scales with input length, so an hour-long session is
+        split on speaker turns, each window condensed concurrently on the
+        cheap tier, and the final notes prompt receives the condensed parts.
+        """
+        chunks = _chunk_transcript(transcript)
+        if len(chunks) <= 1:
+            return transcript
+
+        logger.info("Long transcript: condensing %d windows in parallel", len(chunks))
+        with ThreadPoolExecutor(max_workers=min(len(chunks), 4)) as pool:
+            partials = list(pool.map(self._summarize_chunk, chunks))
+
+        sections = [
+            f"[Part {i} of {len(partials)}]\n{part}"
+            for i, part in enumerate(partials, 1)
+        ]
+        return (
+            "CONDENSED TRANSCRIPT (the session was condensed in consecutive "
+            "parts; each part below covers one window of the session):\n\n"
+            + "\n\n".join(sections)
+        )
+
+    def _build_session_prompts(self, transcript, session_type, client_name, client_id, db):
+        """
+        Fetch RAG context and build the prompts for a session summary
+
+        Returns:
+            Tuple of (system_prompt, user_prompt, session_count)
+        """
+        transcript = _compress_transcript(transcript)
+        if len(transcript) > _MAPREDUCE_THRESHOLD_CHARS:
+            transcript = self._map_reduce_transcript(transcript)
+
+        # Fetch client context for RAG
+        client_context = ""
+        patterns_context = ""
+        session_count = 0
+        if client_id is not None and db is not None:
+            # Both context blocks derive from the same notes, so fetch them
+            # once and build both strings locally — one round-trip instead of
+            # two overlapped ones
+            notes = self._fetch_context_bundle(db, client_id, 3)
+            client_context, session_count = _build_client_context(notes)
+            patterns_context = _extract_patterns(notes)
+            if session_count > 0:
+                logger.debug("Added context from %d previous session(s)", session_count)
+                if patterns_context:
+                    logger.debug("Added cognitive patterns history for tracking")
+            else:
+                logger.debug("First session for this client - establishing baseline")
+        
+        # Note: Transcripts may contain mixed Hindi/English (Hinglish)
+        # Always generate summaries in English for consistency
+        logger.debug("Generating summary in English (transcript may contain Hindi/English mix)")
+        
+        # Always use English prompts - AI will understand bilingual transcripts
+        # Adjust based on session count
+        if session_count == 0:
+            # First session - establish baseline
+            system_prompt = _FIRST_SESSION_SYSTEM_PROMPT
+        else:
+            # Subsequent sessions - compare and track progress
+            system_prompt = _FOLLOWUP_SYSTEM_PROMPT
+
+        if session_count == 0:
+            user_prompt = _FIRST_SESSION_USER_PREFIX_TMPL.format(
+                client_name=client_name if client_name else '[Name]',
+                session_type=session_type
+            ) + transcript + _FIRST_SESSION_USER_SUFFIX
+        else:
+            user_prompt = _FOLLOWUP_USER_PREFIX_TMPL.format(
+                context=f"{client_context}{patterns_context}",
+                session_number=session_count + 1,
+                client_name=client_name if client_name else '[Name]',
+                session_type=session_type
+            ) + transcript + _FOLLOWUP_USER_SUFFIX
+        
+        return system_prompt, user_prompt, session_count
+
+    def _single_flight(self, key: str, fn):
+        """
+        Coalesce concurrent identical requests onto one LLM call
+
+        The first caller for a key owns the call; everyone else who arrives
+        while it runs blocks on its Future and shares the result, so a burst
+        of N duplicate requests costs one generation instead of N.
+        """
+        with self._inflight_lock:
+            fut = self._inflight.get(key)
+            if fut is not None:
+                owner = False
+            else:
+                fut = Future()
+                self._inflight[key] = fut
+                owner = True
+
+        if not owner:
+            return fut.result()
+
+        try:
+            result = fn()
+            fut.set_result(result)
+            return result
+        except Exception as exc:
+            fut.set_exception(exc)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+
+    def _exact_cache_get(self, key: str) -> Optional[Dict]:
+        """Look up a result in memory first, then in the on-disk cache"""
+        if self._cache_disabled:
+            return None
+        result = self._exact_cache.get(key)
+        if result is not None:
+            return result
+
+        path = os.path.join(_SUMMARY_CACHE_DIR, f"{key}.json")
+        try:
+            if time.time() - os.path.getmtime(path) < _SUMMARY_CACHE_TTL:
+                with open(path, 'r', encoding='utf-8') as f:
+                    result = json.load(f)
+                self._exact_cache[key] = result
+                return result
+        except (OSError, ValueError):
+            pass
+        return None
+
+    def _exact_cache_put(self, key: str, result: Dict) -> None:
+        """Store a successful result under its exact key (bounded, FIFO eviction)"""
+        if self._cache_disabled:
+            return
+        if len(self._exact_cache) >= _EXACT_CACHE_MAX:
+            self._exact_cache.pop(next(iter(self._exact_cache)))
+        self._exact_cache[key] = result
+
+        # Persist best-effort; a failed write only costs the disk hit
+        try:
+            os.makedirs(_SUMMARY_CACHE_DIR, exist_ok=True)
+            with open(os.path.join(_SUMMARY_CACHE_DIR, f"{key}.json"), 'w', encoding='utf-8') as f:
+                json.dump(result, f)
+        except (OSError, TypeError):
+            pass
+
+    def _semantic_cache_get(self, method: str, vec) -> Optional[Dict]:
+        """Look up a cached result for a near-identical transcript"""
+        if vec is None or self._cache_disabled:
+            return None
+        for cached_method, cached_vec, result in self._semantic_cache:
+            if cached_method == method and float(cached_vec @ vec) >= _SEMANTIC_CACHE_THRESHOLD:
+                return result
+        return None
 
-**Clinical Observations:**
-- CLIENT's mood, affect, and emotional state during session
-- Changes or consistency in CLIENT's behavior patterns
-- CLIENT's level of engagement and motivation
+    def _semantic_cache_put(self, method: str, vec, result: Dict) -> None:
+        """Store a successful result (bounded, FIFO eviction)"""
+        if vec is None or self._cache_disabled:
+            return
+        if len(self._semantic_cache) >= _SEMANTIC_CACHE_MAX:
+            self._semantic_cache.pop(0)
+        self._semantic_cache.append((method, vec, result))
 
-**Today's Interventions:**
-- Therapeutic approaches or techniques used by THERAPIST
-- Key insights or breakthroughs achieved by CLIENT
-- CLIENT's response to THERAPIST's interventions
+    def _pick_model(self, provider: str, transcript: str) -> str:
+        """
+        Route a transcript to the cheapest model that can handle it
 
-**Cognitive Patterns Identified:**
-Analyze the CLIENT's statements in today's transcript for these specific patterns:
-- Self-blame: CLIENT blaming themselves excessively for outcomes
-- Avoidance: CLIENT avoiding thoughts, feelings, or situations
-- All-or-nothing thinking: CLIENT viewing situations in black-and-white extremes
-- Depressive language: CLIENT's expressions of hopelessness, worthlessness, or helplessness
-- Catastrophizing: CLIENT expecting worst-case scenarios or magnifying problems
+        SUMMARY_MODEL_OVERRIDE pins every call to one model, bypassing the
+        length-based tiers.
+        """
+        override = os.environ.get('SUMMARY_MODEL_OVERRIDE')
+        if override:
+            return override
+        tiers = _MODEL_TIERS.get(provider)
+        if tiers is None:
+            return _PROVIDER_MODELS.get(provider, '')
+        if len(transcript) < _SHORT_TRANSCRIPT_CHARS:
+            return tiers[0]
+        if len(transcript) < _LONG_TRANSCRIPT_CHARS:
+            return tiers[1]
+        return tiers[2]
 
-⭐ IMPORTANT - If pattern history is provided below, use it to:
-- Compare current patterns in CLIENT to previous sessions
-- Note if CLIENT's patterns are INCREASING, DECREASING, or STABLE
-- Identify NEW patterns in CLIENT not seen before
-- Highlight patterns in CLIENT that have RESOLVED or improved
+    def _aux_model(self) -> str:
+        """Model for auxiliary extraction calls: cheap tier or QUICK_MODEL"""
+        if self.quick_model:
+            return self.quick_model
+        tiers = _MODEL_TIERS.get(self.provider)
+        return tiers[0] if tiers else _PROVIDER_MODELS.get(self.provider, '')
 
-List ONLY patterns that are clearly evident in the CLIENT's statements today with brief examples.
-Note changes in frequency or intensity compared to previous sessions when history is available.
+    def _client_for(self, provider: str, client, model: str):
+        """Bind the Gemini client to the routed model (other SDKs take model per call)"""
+        if provider == 'gemini' and model != _PROVIDER_MODELS['gemini']:
+            import google.generativeai as genai
+            return genai.GenerativeModel(model)
+        return client
 
-**Homework & Next Steps:**
-- New assignments and skills for CLIENT to practice
-- Specific goals for CLIENT for next session
+    def _call_with_retry(self, fn, max_attempts: int = 3, base: float = 1.0, cap: float = 30.0):
+        """
+        Call fn, retrying transient provider failures
 
-Keep notes factual with CLEAR distinction between CLIENT and THERAPIST roles.
-Focus on CLIENT's presentation, progress, and patterns - not the therapist's.
-Base everything on transcript and context provided. Write ENTIRELY IN ENGLISH. Total length: 400-650 words."""
+        Uses exponential backoff with full jitter so a burst of failing
+        requests does not retry in lockstep. Non-transient errors (auth,
+        invalid request) are raised immediately.
+        """
+        for attempt in range(max_attempts):
+            # Retries respect the breaker too: during an outage the loop
+            # stops burning backoff time and raises immediately
+            self._cb.check()
+            self._limiter.acquire()
+            try:
+                result = fn()
+                self._cb.record_success()
+                return result
+            except Exception as e:
+                self._cb.record_failure()
+                if attempt == max_attempts - 1 or not _is_retryable_error(e):
+                    raise
+                delay = random.uniform(0, min(cap, base * (2 ** attempt)))
+                logger.warning("Transient provider error (%s); retrying in %.1fs", e, delay)
+                time.sleep(delay)
 
-            if session_count == 0:
-                user_prompt = f"""This is the FIRST session with {client_name if client_name else '[Name]'}.
-Create a comprehensive baseline assessment that will form the foundation for future sessions.
+    def _stream_provider(self, provider, client, system_prompt, user_prompt, model=None):
+        """Yield text fragments from one provider with streaming enabled"""
+        if model is None:
+            model = _PROVIDER_MODELS[provider]
+        if provider == 'gemini':
+            client = self._client_for(provider, client, model)
+            response = self._call_with_retry(
+                lambda: client.generate_content(f"{system_prompt}\n\n{user_prompt}", stream=True))
+            for chunk in response:
+                if chunk.text:
+                    yield chunk.text
+        else:
+            # Groq and OpenAI share the OpenAI-compatible chat API. The
+            # stable cache key helps OpenAI route repeat prompts to the same
+            # prefix cache (ignored via extra_body for other providers)
+            extra = {'prompt_cache_key': 'therapy-notes-v1'} if provider == 'openai' else None
+            response = self._call_with_retry(lambda: client.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                extra_body=extra,
+                temperature=0.7,
+                max_tokens=2000,
+                stream=True
+            ))
+            for chunk in response:
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
 
-Session Type: {session_type}
+    def _summary_result(self, summary, provider_label, model, session_count) -> Dict:
+        """Response dict shared by the blocking and streaming paths"""
+        return {
+            'success': True,
+            'summary': summary,
+            'model': model,
+            'provider': provider_label,
+            'session_count': session_count,
+            'is_first_session': session_count == 0,
+            'tokens_used': None  # usage totals are not reported on streamed responses
+        }
 
-TRANSCRIPT (with clear speaker labels - THERAPIST: and CLIENT:):
-{transcript}
+    def generate_session_summary(
+        self, 
+        transcript: str, 
+        session_type: str = "individual",
+        client_name: Optional[str] = None,
+        language: str = "en",
+        client_id: Optional[str] = None,
+        db = None
+    ) -> Dict:
+        """
+        Generate a comprehensive summary of a therapy session with RAG context
+        
+        Args:
+            transcript: Full transcript of the session
+            session_type: Type of session (individual, group, etc.)
+            client_name: Name of the client (optional, for personalization)
+            language: Language for the summary ('en' or 'hi')
+            client_id: Client's ID for fetching past context
+            db: Database connection for RAG
+            
+        Returns:
+            Dictionary with summary results
+        """
+        # Aborted or near-empty sessions don't justify a 2-10s LLM call: when
+        # the transcript is very short or highly repetitive, answer with a
+        # local extractive summary. ENTROPY_THRESHOLD (unique-token ratio,
+        # default 0.15) tunes the cost/accuracy trade-off
+        tokens = transcript.split()
+        unique_ratio = len(set(tokens)) / max(len(tokens), 1)
+        entropy_threshold = float(os.environ.get('ENTROPY_THRESHOLD', '0.15'))
+        if len(tokens) < _MIN_TRANSCRIPT_TOKENS or unique_ratio < entropy_threshold:
+            logger.info("Transcript too short/repetitive (%d tokens, unique ratio %.2f) - skipping LLM call",
+                        len(tokens), unique_ratio)
+            return {
+                'success': True,
+                'summary': _extractive_fallback(transcript),
+                'provider': 'local-extractive',
+                'model': None,
+                'session_count': 0,
+                'is_first_session': None,
+                'tokens_used': 0,
+                'skipped_llm': True
+            }
 
-CRITICAL REMINDERS:
-- Lines starting with "CLIENT:" show what the CLIENT said
-- Lines starting with "THERAPIST:" show what the THERAPIST said
-- Document the CLIENT's presenting problems, not the therapist's questions
-- Focus your assessment on the CLIENT's statements, behaviors, and patterns
+        # Identical requests (retries, polling UIs) are a dict lookup; near-
+        # duplicates fall through to the semantic cache. The keys include the
+        # client so RAG-contextualized notes never cross clients
+        exact_key = _exact_key('session', self.provider, session_type, client_name, language, client_id, transcript)
+        cached = self._exact_cache_get(exact_key)
+        if cached is not None:
+            return {**cached, 'cached': True}
 
-Generate detailed initial assessment notes based only on what was discussed.
-Establish clear baseline for future progress tracking.
-WRITE YOUR ENTIRE RESPONSE IN ENGLISH."""
-            else:
-                user_prompt = f"""{client_context}{patterns_context}This is SESSION #{session_count + 1} with {client_name if client_name else '[Name]'}.
+        cache_method = f"session:{client_id}"
+        vec = _transcript_vector(transcript)
+        cached = self._semantic_cache_get(cache_method, vec)
+        if cached is not None:
+            logger.info("Semantic cache hit - reusing previous summary")
+            return {**cached, 'cached': True}
 
-Session Type: {session_type}
+        def _generate():
+            # Buffer the streaming pipeline into the familiar dict result
+            result = {'success': False, 'error': 'Summary generation produced no result'}
+            for event in self.generate_session_summary_stream(
+                transcript,
+                session_type=session_type,
+                client_name=client_name,
+                language=language,
+                client_id=client_id,
+                db=db
+            ):
+                if event['event'] in ('done', 'error'):
+                    result = event['data']
+            if result.get('success'):
+                self._exact_cache_put(exact_key, result)
+                self._semantic_cache_put(cache_method, vec, result)
+            return result
 
-TODAY'S TRANSCRIPT (with clear speaker labels - THERAPIST: and CLIENT:):
-{transcript}
+        # Concurrent identical requests (webhook retries, multiple open tabs)
+        # share one generation rather than hitting the API N times
+        return self._single_flight(exact_key, _generate)
 
-CRITICAL REMINDERS:
-- Lines starting with "CLIENT:" show what the CLIENT said
-- Lines starting with "THERAPIST:" show what the THERAPIST said
-- Document the CLIENT's problems and progress, not the therapist's interventions
-- Focus on CLIENT's statements when identifying cognitive patterns
+    def generate_session_summary_stream(
+        self,
+        transcript: str,
+        session_type: str = "individual",
+        client_name: Optional[str] = None,
+        language: str = "en",
+        client_id: Optional[str] = None,
+        db = None
+    ):
+        """
+        Streaming variant of generate_session_summary
 
-Generate clinical notes using past session context AND cognitive patterns history provided above.
-Specifically highlight:
-- What has IMPROVED? (progress, positive changes, resolved patterns)
-- What has WORSENED or stayed STAGNANT? (setbacks, challenges, persistent patterns)
-- What PATTERNS are emerging? (recurring themes, behaviors, new patterns)
-- How is the client's UNDERSTANDING evolving? (insight development)
-- How have COGNITIVE PATTERNS changed? (compare to history when available)
+        Yields {'event': 'token'|'done'|'error', 'data': ...} as the model
+        produces text, so callers can surface the first tokens immediately;
+        the 'done' event carries the same dict the blocking method returns.
+        """
+        self._ensure_client()
+        if not self.is_available():
+            yield {'event': 'error', 'data': {
+                'success': False,
+                'error': 'Summary service not configured. Please set GEMINI_API_KEY or OPENAI_API_KEY.'
+            }}
+            return
+
+        # Direct stream callers (SSE routes) get the same exact-cache fast
+        # path as the blocking wrapper: replay the cached text as one token
+        exact_key = _exact_key('session', self.provider, session_type, client_name, language, client_id, transcript)
+        cached = self._exact_cache_get(exact_key)
+        if cached is not None:
+            yield {'event': 'token', 'data': cached.get('summary', '')}
+            yield {'event': 'done', 'data': {**cached, 'cached': True}}
+            return
+
+        t_start = time.perf_counter()
+        try:
+            system_prompt, user_prompt, session_count = self._build_session_prompts(
+                transcript, session_type, client_name, client_id, db
+            )
+            t_prompt_ms = (time.perf_counter() - t_start) * 1000
 
-WRITE YOUR ENTIRE RESPONSE IN ENGLISH."""
-            
             # Try primary provider first, then fallback
             try:
-                if self.provider == 'gemini':
-                    # Use Gemini API
-                    full_prompt = f"{system_prompt}\n\n{user_prompt}"
-                    response = self.client.generate_content(full_prompt)
-                    summary = response.text
-                    
-                    return {
-                        'success': True,
-                        'summary': summary,
-                        'model': 'gemini-2.0-flash',
-                        'provider': 'gemini',
-                        'session_count': session_count,
-                        'is_first_session': session_count == 0,
-                        'tokens_used': None
-                    }
-                
-                elif self.provider == 'groq':
-                    # Use Groq API (OpenAI-compatible)
-                    response = self.client.chat.completions.create(
-                        model="llama-3.3-70b-versatile",  # Fast and free
-                        messages=[
-                            {"role": "system", "content": system_prompt},
-                            {"role": "user", "content": user_prompt}
-                        ],
-                        temperature=0.7,
-                        max_tokens=2000
-                    )
-                    
-                    summary = response.choices[0].message.content
-                    
-                    return {
-                        'success': True,
-                        'summary': summary,
-                        'model': response.model,
-                        'provider': 'groq',
-                        'session_count': session_count,
-                        'is_first_session': session_count == 0,
-                        'tokens_used': response.usage.total_tokens if hasattr(response, 'usage') else None
-                    }
-                    
-                else:  # OpenAI
-                    response = self.client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=[
-                            {"role": "system", "content": system_prompt},
-                            {"role": "user", "content": user_prompt}
-                        ],
-                        temperature=0.7,
-                        max_tokens=2000
-                    )
-                    
-                    summary = response.choices[0].message.content
-                    
-                    return {
-                        'success': True,
-                        'summary': summary,
-                        'model': response.model,
-                        'provider': 'openai',
-                        'session_count': session_count,
-                        'is_first_session': session_count == 0,
-                        'tokens_used': response.usage.total_tokens if hasattr(response, 'usage') else None
-                    }
-                    
+                model = self._pick_model(self.provider, transcript)
+                t_llm = time.perf_counter()
+                pieces = []
+                for fragment in self._stream_provider(self.provider, self.client, system_prompt, user_prompt, model=model):
+                    pieces.append(fragment)
+                    yield {'event': 'token', 'data': fragment}
+                t_llm_ms = (time.perf_counter() - t_llm) * 1000
+
+                # One structured record per summary so slow requests are
+                # attributable to a phase (context/prompt build vs. LLM)
+                logger.info('summary_done', extra={
+                    't_prompt_ms': round(t_prompt_ms, 1),
+                    't_llm_ms': round(t_llm_ms, 1),
+                    'total_ms': round((time.perf_counter() - t_start) * 1000, 1),
+                    'provider': self.provider,
+                    'model': model,
+                    'session_count': session_count
+                })
+                result = self._summary_result(
+                    ''.join(pieces), self.provider, model, session_count
+                )
+                if result.get('success'):
+                    self._exact_cache_put(exact_key, result)
+                yield {'event': 'done', 'data': result}
+                return
+
             except Exception as primary_error:
                 # Try fallback: Gemini -> Groq
-                print(f"[SUMMARY] Primary provider ({self.provider}) failed: {str(primary_error)}")
-                print(f"[SUMMARY] Attempting fallback...")
-                
-                # Try Groq if primary was Gemini
+                logger.warning("Primary provider (%s) failed: %s; attempting fallback", self.provider, primary_error)
+
                 if self.groq_key and self.provider == 'gemini':
-                    try:
-                        from groq import Groq
-                        groq_client = Groq(api_key=self.groq_key)
-                        
-                        response = groq_client.chat.completions.create(
-                            model="llama-3.3-70b-versatile",
-                            messages=[
-                                {"role": "system", "content": system_prompt},
-                                {"role": "user", "content": user_prompt}
-                            ],
-                            temperature=0.7,
-                            max_tokens=2000
-                        )
-                        
-                        summary = response.choices[0].message.content
-                        print(f"[SUMMARY] ✓ Fallback to Groq successful")
-                        
-                        return {
-                            'success': True,
-                            'summary': summary,
-                            'model': response.model,
-                            'provider': 'groq (fallback)',
-                            'session_count': session_count,
-                            'is_first_session': session_count == 0,
-                            'tokens_used': response.usage.total_tokens if hasattr(response, 'usage') else None
-                        }
-                    except Exception as groq_error:
-                        print(f"[SUMMARY] Groq fallback also failed: {str(groq_error)}")
-                        # Don't raise - let it fall through to outer exception handler
-                        error_message = f'All providers failed. Primary ({self.provider}): {str(primary_error)}, Groq fallback: {str(groq_error)}'
-                        return {
-                            'success': False,
-                            'error': error_message
-                        }
-                        
-                # Try Gemini if primary was Groq
+                    fb_provider, fb_client = 'groq', _build_client('groq', self.groq_key)
                 elif self.gemini_key and self.provider == 'groq':
-                    # Fallback to Gemini
-                    try:
-                        import google.generativeai as genai
-                        genai.configure(api_key=self.gemini_key)
-                        gemini_client = genai.GenerativeModel('gemini-2.0-flash')
-                        
-                        full_prompt = f"{system_prompt}\n\n{user_prompt}"
-                        response = gemini_client.generate_content(full_prompt)
-                        summary = response.text
-                        print(f"[SUMMARY] ✓ Fallback to Gemini successful")
-                        
-                        return {
-                            'success': True,
-                            'summary': summary,
-                            'model': 'gemini-2.0-flash',
-                            'provider': 'gemini (fallback)',
-                            'session_count': session_count,
-                            'is_first_session': session_count == 0,
-                            'tokens_used': None
-                        }
-                    except Exception as fallback_error:
-                        print(f"[SUMMARY] Fallback to Gemini also failed: {str(fallback_error)}")
-                        # Don't raise - return error dict instead
-                        error_message = f'All providers failed. Primary ({self.provider}): {str(primary_error)}, Gemini fallback: {str(fallback_error)}'
-                        return {
-                            'success': False,
-                            'error': error_message
-                        }
+                    fb_provider, fb_client = 'gemini', _build_client('gemini', self.gemini_key)
                 else:
                     # No fallback available
-                    error_message = f'Primary provider failed and no fallback configured: {str(primary_error)}'
-                    return {
+                    yield {'event': 'error', 'data': {
                         'success': False,
-                        'error': error_message
-                    }
-            
+                        'error': f'Primary provider failed and no fallback configured: {str(primary_error)}'
+                    }}
+                    return
+
+                try:
+                    fb_model = self._pick_model(fb_provider, transcript)
+                    pieces = []
+                    for fragment in self._stream_provider(fb_provider, fb_client, system_prompt, user_prompt, model=fb_model):
+                        pieces.append(fragment)
+                        yield {'event': 'token', 'data': fragment}
+
+                    logger.info('summary_done', extra={
+                        't_prompt_ms': round(t_prompt_ms, 1),
+                        'total_ms': round((time.perf_counter() - t_start) * 1000, 1),
+                        'provider': f'{fb_provider} (fallback)',
+                        'model': fb_model,
+                        'session_count': session_count
+                    })
+                    result = self._summary_result(
+                        ''.join(pieces), f'{fb_provider} (fallback)', fb_model, session_count
+                    )
+                    if result.get('success'):
+                        self._exact_cache_put(exact_key, result)
+                    yield {'event': 'done', 'data': result}
+                except Exception as fallback_error:
+                    logger.error("%s fallback also failed: %s", fb_provider.capitalize(), fallback_error)
+                    yield {'event': 'error', 'data': {
+                        'success': False,
+                        'error': f'All providers failed. Primary ({self.provider}): {str(primary_error)}, {fb_provider.capitalize()} fallback: {str(fallback_error)}'
+                    }}
+
         except Exception as e:
             error_message = f'Summary generation failed: {str(e)}'
-            print(f"[SUMMARY] ERROR: {error_message}")
-            return {
+            logger.error("%s", error_message)
+            yield {'event': 'error', 'data': {'success': False, 'error': error_message}}
+    
+    def generate_session_summaries_batch(self, items: list) -> list:
+        """
+        Summarise many sessions in as few LLM calls as possible
+
+        Bulk backfills used to loop over generate_session_summary, paying one
+        round-trip per session. This packs sessions into combined prompts
+        under a character budget and asks for a JSON array back, so K
+        sessions cost one call (or a few, run in parallel).
+
+        Args:
+            items: List of dicts with 'id' and 'transcript' (optionally
+                'session_type' and 'client_name')
+
+        Returns:
+            List of result dicts in input order, each carrying its 'id'
+        """
+        self._ensure_client()
+        if not self.is_available():
+            return [{
+                'id': item.get('id'),
                 'success': False,
-                'error': error_message
+                'error': 'Summary service not configured'
+            } for item in items]
+
+        # Pack items into batches under the character budget
+        batches = []
+        current, used = [], 0
+        for item in items:
+            size = len(item.get('transcript', ''))
+            if current and used + size > _BATCH_PROMPT_CHAR_BUDGET:
+                batches.append(current)
+                current, used = [], 0
+            current.append(item)
+            used += size
+        if current:
+            batches.append(current)
+
+        results_by_id = {}
+        if len(batches) > 1:
+            with ThreadPoolExecutor(max_workers=min(len(batches), 4)) as pool:
+                for batch_results in pool.map(self._summaries_batch_call, batches):
+                    results_by_id.update(batch_results)
+        else:
+            for batch in batches:
+                results_by_id.update(self._summaries_batch_call(batch))
+
+        return [
+            results_by_id.get(str(item.get('id')), {
+                'id': item.get('id'),
+                'success': False,
+                'error': 'No result returned for this session'
+            })
+            for item in items
+        ]
+
+    def _summaries_batch_call(self, batch: list) -> Dict:
+        """One LLM call summarising a batch of sessions, keyed by session id"""
+
+        sections = []
+        for item in batch:
+            transcript = _compress_transcript(item.get('transcript', ''))
+            sections.append(
+                f"SESSION ID: {item.get('id')}\n"
+                f"Session Type: {item.get('session_type', 'individual')}\n"
+                f"Client: {item.get('client_name') or '[Name withheld]'}\n"
+                f"TRANSCRIPT:\n{transcript}"
+            )
+
+        user_prompt = (
+            "Create concise clinical session notes for EACH of the following "
+            "therapy sessions. Base every note only on its own transcript.\n\n"
+            + "\n\n---\n\n".join(sections)
+            + '\n\nReturn ONLY a valid JSON object shaped as '
+              '{"results": [{"id": "<session id>", "notes": "<clinical notes>"}, ...]} '
+              'with one entry per session, in the same order.'
+        )
+
+        try:
+            response_text = self._complete(
+                user_prompt, _PROVIDER_MODELS[self.provider],
+                json_mode=True, temperature=0.7, max_tokens=4000
+            )
+            payload = json.loads(_strip_json_fences(response_text))
+
+            return {
+                str(entry.get('id')): {
+                    'id': entry.get('id'),
+                    'success': True,
+                    'summary': entry.get('notes', ''),
+                    'provider': self.provider,
+                    'model': _PROVIDER_MODELS[self.provider]
+                }
+                for entry in payload.get('results', [])
             }
-    
+        except Exception as e:
+            return {
+                str(item.get('id')): {
+                    'id': item.get('id'),
+                    'success': False,
+                    'error': f'Batch summary failed: {str(e)}'
+                }
+                for item in batch
+            }
+
     def generate_quick_summary(self, transcript: str, max_length: int = 200) -> Dict:
         """
         Generate a quick, brief summary of the session
@@ -545,43 +1459,73 @@ WRITE YOUR ENTIRE RESPONSE IN ENGLISH."""
         Returns:
             Dictionary with summary results
         """
+        self._ensure_client()
         if not self.is_available():
             return {
                 'success': False,
                 'error': 'Summary service not configured'
             }
         
-        try:
-            prompt = f"Summarize the following therapy session in {max_length} words or less. Focus on key points.\n\n{transcript}"
-            
-            if self.provider == 'gemini':
-                response = self.client.generate_content(prompt)
-                summary = response.text
-            else:  # OpenAI
-                response = self.client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[
-                        {
-                            "role": "system", 
-                            "content": f"Summarize the following therapy session in {max_length} words or less. Focus on key points."
-                        },
-                        {"role": "user", "content": transcript}
-                    ],
-                    temperature=0.5,
-                    max_tokens=300
-                )
-                summary = response.choices[0].message.content
-            
-            return {
+        exact_key = _exact_key('quick', self.provider, max_length, transcript)
+        cached = self._exact_cache_get(exact_key)
+        if cached is not None:
+            return {**cached, 'cached': True}
+
+        vec = _transcript_vector(transcript)
+        cached = self._semantic_cache_get('quick', vec)
+        if cached is not None:
+            return {**cached, 'cached': True}
+
+        def _generate():
+            summary = ''.join(self.generate_quick_summary_stream(transcript, max_length=max_length))
+
+            result = {
                 'success': True,
                 'summary': summary
             }
-            
+            self._exact_cache_put(exact_key, result)
+            self._semantic_cache_put('quick', vec, result)
+            return result
+
+        try:
+            return self._single_flight(exact_key, _generate)
+
         except Exception as e:
             return {
                 'success': False,
                 'error': f'Quick summary failed: {str(e)}'
             }
+
+    def generate_quick_summary_stream(self, transcript: str, max_length: int = 200):
+        """Stream a quick summary's text as the model produces it"""
+        self._ensure_client()
+        transcript = _shape_transcript(_compress_transcript(transcript))
+        model = self._aux_model()
+        if self.provider == 'gemini':
+            prompt = f"Summarize the following therapy session in {max_length} words or less. Focus on key points.\n\n{transcript}"
+            client = self._client_for(self.provider, self.client, model)
+            response = self._call_with_retry(lambda: client.generate_content(prompt, stream=True))
+            for chunk in response:
+                if chunk.text:
+                    yield chunk.text
+        else:  # OpenAI
+            response = self._call_with_retry(lambda: self.client.chat.completions.create(
+                model=model,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": f"Summarize the following therapy session in {max_length} words or less. Focus on key points."
+                    },
+                    {"role": "user", "content": transcript}
+                ],
+                temperature=0.5,
+                max_tokens=min(300, max_length * 2),
+                stream=True
+            ))
+            for chunk in response:
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
     
     def extract_key_points(self, transcript: str) -> Dict:
         """
@@ -593,66 +1537,47 @@ WRITE YOUR ENTIRE RESPONSE IN ENGLISH."""
         Returns:
             Dictionary with extracted key points
         """
+        self._ensure_client()
         if not self.is_available():
             return {
                 'success': False,
                 'error': 'Summary service not configured'
             }
         
-        try:
-            json_format = """{
-    "main_topics": ["topic1", "topic2", ...],
-    "emotions_identified": ["emotion1", "emotion2", ...],
-    "action_items": ["action1", "action2", ...],
-    "progress_notes": "brief progress note",
-    "next_session_focus": "suggested focus areas"
-}"""
-            
-            if self.provider == 'gemini':
-                prompt = f"""Extract key information from this therapy session in JSON format:
-{json_format}
-
-Transcript:
-{transcript}
-
-Return only valid JSON."""
-                
-                response = self.client.generate_content(prompt)
-                import json
-                # Clean response text to get JSON
-                response_text = response.text.strip()
-                # Remove markdown code blocks if present
-                if response_text.startswith('```'):
-                    response_text = response_text.split('```')[1]
-                    if response_text.startswith('json'):
-                        response_text = response_text[4:]
-                    response_text = response_text.strip()
-                
-                key_points = json.loads(response_text)
-                
-            else:  # OpenAI
-                response = self.client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": f"Extract key information from this therapy session in JSON format:\n{json_format}"
-                        },
-                        {"role": "user", "content": transcript}
-                    ],
-                    temperature=0.3,
-                    max_tokens=500,
-                    response_format={"type": "json_object"}
-                )
-                
-                import json
-                key_points = json.loads(response.choices[0].message.content)
-            
-            return {
+        exact_key = _exact_key('key_points', self.provider, transcript)
+        cached = self._exact_cache_get(exact_key)
+        if cached is not None:
+            return {**cached, 'cached': True}
+
+        vec = _transcript_vector(transcript)
+        cached = self._semantic_cache_get('key_points', vec)
+        if cached is not None:
+            return {**cached, 'cached': True}
+
+        def _generate():
+            compressed = _shape_transcript(_compress_transcript(transcript))
+            model = self._aux_model()
+
+            # Native JSON mode on both paths: the model returns raw JSON, so
+            # fence stripping below is only a safety net
+            response_text = self._complete(
+                compressed, model,
+                system=f"Extract key information from this therapy session in JSON format:\n{_KEY_POINTS_FORMAT}",
+                json_mode=True, temperature=0.3, max_tokens=400
+            )
+            key_points = json.loads(_strip_json_fences(response_text))
+
+            result = {
                 'success': True,
                 'key_points': key_points
             }
-            
+            self._exact_cache_put(exact_key, result)
+            self._semantic_cache_put('key_points', vec, result)
+            return result
+
+        try:
+            return self._single_flight(exact_key, _generate)
+
         except Exception as e:
             return {
                 'success': False,
@@ -660,14 +1585,199 @@ Return only valid JSON."""
             }
 
 
+    def generate_full_report(
+        self,
+        transcript: str,
+        session_type: str = "individual",
+        client_name: Optional[str] = None,
+        language: str = "en",
+        client_id: Optional[str] = None,
+        db = None
+    ) -> Dict:
+        """
+        Generate clinical notes, quick summary and key points in ONE LLM call
+
+        The three separate methods each re-send the full transcript; asking
+        for a single JSON object with all three outputs costs one round-trip
+        and one copy of the input tokens. Falls back to the individual calls
+        if the combined response cannot be produced or parsed.
+        """
+        self._ensure_client()
+        if not self.is_available():
+            return {
+                'success': False,
+                'error': 'Summary service not configured. Please set GEMINI_API_KEY or OPENAI_API_KEY.'
+            }
+
+        try:
+            system_prompt, user_prompt, session_count = self._build_session_prompts(
+                transcript, session_type, client_name, client_id, db
+            )
+
+            combined_prompt = (
+                f"{user_prompt}\n\n"
+                f"Return ONLY a valid JSON object with exactly this structure:\n{_FULL_REPORT_FORMAT}"
+            )
+
+            model = self._pick_model(self.provider, transcript)
+            response_text = self._complete(
+                combined_prompt, model, system=system_prompt,
+                json_mode=True, temperature=0.7, max_tokens=3000
+            )
+
+            report = json.loads(_strip_json_fences(response_text))
+
+            return {
+                'success': True,
+                'summary': self._summary_result(
+                    report['clinical_notes'], self.provider,
+                    model, session_count
+                ),
+                'quick_summary': {'success': True, 'summary': report['quick_summary']},
+                'key_points': {'success': True, 'key_points': report['key_points']}
+            }
+
+        except Exception as e:
+            # One bad JSON response should not sink the whole report; fall
+            # back to the three separate calls
+            logger.warning("Combined report failed (%s); falling back to separate calls", e)
+            return {
+                'success': True,
+                'summary': self.generate_session_summary(
+                    transcript,
+                    session_type=session_type,
+                    client_name=client_name,
+                    language=language,
+                    client_id=client_id,
+                    db=db
+                ),
+                'quick_summary': self.generate_quick_summary(transcript),
+                'key_points': self.extract_key_points(transcript)
+            }
+
+    def generate_bundle(
+        self,
+        transcript: str,
+        session_type: str = "individual",
+        client_name: Optional[str] = None,
+        language: str = "en",
+        client_id: Optional[str] = None,
+        db = None
+    ) -> Dict:
+        """
+        Run the session summary and key-point extraction in parallel (sync)
+
+        Same fan-out as process_session but callable from the sync Flask
+        routes: the two independent LLM calls run on worker threads, so the
+        bundle finishes in the time of the slower call instead of their sum.
+        Retries/rate limiting stay inside each call via _call_with_retry.
+        """
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            summary_future = pool.submit(
+                self.generate_session_summary,
+                transcript,
+                session_type=session_type,
+                client_name=client_name,
+                language=language,
+                client_id=client_id,
+                db=db
+            )
+            key_points_future = pool.submit(self.extract_key_points, transcript)
+            return {
+                'summary': summary_future.result(),
+                'key_points': key_points_future.result()
+            }
+
+    def generate_many(self, transcripts: list, max_workers: int = 10, **kwargs) -> list:
+        """
+        Re-generate summaries for many transcripts with bounded concurrency
+
+        For rerun sweeps over K stored transcripts: a bounded thread pool
+        keeps at most max_workers requests in flight, so the sweep takes
+        roughly K/max_workers wall time while the shared token bucket and
+        circuit breaker still cap the provider-side request rate.
+        """
+        if not transcripts:
+            return []
+        workers = min(max_workers, len(transcripts))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(
+                lambda t: self.generate_session_summary(t, **kwargs),
+                transcripts
+            ))
+
+    async def agenerate_session_summary(self, transcript: str, **kwargs) -> Dict:
+        """Async wrapper around generate_session_summary (runs on a worker thread)"""
+        return await asyncio.to_thread(self.generate_session_summary, transcript, **kwargs)
+
+    async def agenerate_quick_summary(self, transcript: str, max_length: int = 200) -> Dict:
+        """Async wrapper around generate_quick_summary"""
+        return await asyncio.to_thread(self.generate_quick_summary, transcript, max_length)
+
+    async def aextract_key_points(self, transcript: str) -> Dict:
+        """Async wrapper around extract_key_points"""
+        return await asyncio.to_thread(self.extract_key_points, transcript)
+
+    async def process_session(
+        self,
+        transcript: str,
+        session_type: str = "individual",
+        client_name: Optional[str] = None,
+        language: str = "en",
+        client_id: Optional[str] = None,
+        db = None
+    ) -> Dict:
+        """
+        Run the full post-session pipeline with all three LLM calls in flight
+        at once
+
+        The clinical notes, quick summary and key points are independent
+        network-bound requests, so gathering them takes roughly the time of
+        the slowest call instead of the sum of all three.
+        """
+        summary, quick, key_points = await asyncio.gather(
+            self.agenerate_session_summary(
+                transcript,
+                session_type=session_type,
+                client_name=client_name,
+                language=language,
+                client_id=client_id,
+                db=db
+            ),
+            self.agenerate_quick_summary(transcript),
+            self.aextract_key_points(transcript)
+        )
+        return {
+            'summary': summary,
+            'quick_summary': quick,
+            'key_points': key_points
+        }
+
+
 class MockSummaryService(SummaryService):
     """Mock summary service for testing without API key"""
     
     def __init__(self):
-        """Initialize mock service"""
-        super().__init__()
+        """Initialize mock service (skips the parent's provider probing)"""
+        # Deliberately no super().__init__(): the parent reads env vars and,
+        # if keys are set, imports and configures a real SDK — overhead a
+        # mock should never pay
+        self.provider = 'mock'
+        self.gemini_key = None
+        self.groq_key = None
+        self.openai_key = None
         self.client = True  # Mock client
-    
+        self._client_ready = True
+        self._cb = CircuitBreaker()
+        self._limiter = _TokenBucket(1000.0)  # effectively unthrottled
+        self.quick_model = None
+        self._cache_disabled = True  # mock results are free; keep the disk clean
+        self._semantic_cache = []
+        self._exact_cache = {}
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self._complete = self._gen_openai  # unused; the mock overrides every generate method
+
     def generate_session_summary(
         self, 
         transcript: str, 
@@ -715,6 +1825,14 @@ exercises in the next session.
             'tokens_used': 500
         }
     
+    def generate_session_summaries_batch(self, items: list) -> list:
+        """Mock batch summaries — one mock result per item, no LLM calls"""
+        return [
+            {**self.generate_session_summary(item.get('transcript', '')),
+             'id': item.get('id')}
+            for item in items
+        ]
+
     def generate_quick_summary(self, transcript: str, max_length: int = 200) -> Dict:
         """Mock quick summary"""
         return {
@@ -742,3 +1860,15 @@ exercises in the next session.
                 'next_session_focus': 'Continue anxiety management, explore underlying stress patterns, introduce cognitive restructuring'
             }
         }
+
+
+@functools.cache
+def get_mock_service() -> "MockSummaryService":
+    """
+    Shared MockSummaryService instance
+
+    The mock is stateless apart from its (disabled) caches, so tests and
+    dev-mode flows should call this instead of constructing a new mock per
+    use.
+    """
+    return MockSummaryService()
@@ -2,26 +2,73 @@
 Transcription Service
 Handles voice-to-text transcription for therapy sessions
 """
+import functools
+import io
 import os
 from datetime import datetime
 from typing import List, Dict, Optional
+import httpx
+import numpy as np
 import openai
 from openai import OpenAI
 
+
+@functools.lru_cache(maxsize=64)
+def _format_segments(rows: tuple) -> str:
+    """Format ((timestamp, speaker, text), ...) rows with numeric timestamps
+
+    Memoized on the row tuple: the same transcript is formatted for both
+    the auto-note and the key-points call, and the second formatting is a
+    cache lookup instead of a rebuild.
+    """
+    starts = np.fromiter((row[0] for row in rows), dtype=np.float64, count=len(rows))
+    mins = (starts // 60).astype(np.int64)
+    secs = (starts % 60).astype(np.int64)
+    return '\n'.join(
+        f"[{m:02d}:{s:02d}] {_speaker_label(speaker)}: {text}"
+        for m, s, (_, speaker, text) in zip(mins, secs, rows)
+    )
+
+
+def _speaker_label(speaker: str) -> str:
+    """Canonical uppercase label for a segment's speaker"""
+    low = speaker.lower()
+    if low == 'therapist':
+        return "THERAPIST"
+    if low == 'client':
+        return "CLIENT"
+    return speaker.upper()
+
+
 class TranscriptionService:
     """Service for transcribing audio to text"""
-    
+
     def __init__(self):
         """Initialize transcription service"""
         self.api_key = os.environ.get('OPENAI_API_KEY')
         self.client = None
-        
+        self._http = None
+
         if self.api_key:
-            self.client = OpenAI(api_key=self.api_key)
-    
+            # Keep-alive pool shared across calls: real-time chunks arrive
+            # every few seconds, and without it each request can pay a fresh
+            # TLS handshake
+            self._http = httpx.Client(
+                limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+                timeout=60.0
+            )
+            self.client = OpenAI(api_key=self.api_key, http_client=self._http)
+
     def is_available(self) -> bool:
         """Check if transcription service is available"""
         return self.client is not None
+
+    def close(self) -> None:
+        """Release the HTTP connection pool"""
+        if self._http is not None:
+            self._http.close()
+            self._http = None
+        self.client = None
     
     def transcribe_audio(self, audio_file_path: str, language: str = "en") -> Dict:
         """
@@ -82,20 +129,30 @@ class TranscriptionService:
             }
         
         try:
-            # Create a temporary file
-            import tempfile
-            with tempfile.NamedTemporaryFile(suffix=f'.{format}', delete=False) as temp_file:
-                temp_file.write(audio_data)
-                temp_path = temp_file.name
-            
-            # Transcribe
-            result = self.transcribe_audio(temp_path)
-            
-            # Clean up
-            os.unlink(temp_path)
-            
-            return result
-            
+            # Send the bytes straight from memory: writing a temp file,
+            # reopening it and unlinking it costs a disk round-trip per
+            # chunk on the real-time path. The SDK accepts any named
+            # file-like; the name's extension tells the API the format.
+            audio_buffer = io.BytesIO(audio_data)
+            audio_buffer.name = f'chunk.{format}'
+
+            transcription = self.client.audio.transcriptions.create(
+                model="whisper-1",
+                file=audio_buffer,
+                language="en",
+                response_format="verbose_json",
+                timestamp_granularities=["segment"]
+            )
+
+            return {
+                'success': True,
+                'text': transcription.text,
+                'segments': transcription.segments if hasattr(transcription, 'segments') else [],
+                'language': transcription.language if hasattr(transcription, 'language') else 'en',
+                'duration': transcription.duration if hasattr(transcription, 'duration') else None
+            }
+
+
         except Exception as e:
             return {
                 'success': False,
@@ -112,22 +169,27 @@ class TranscriptionService:
         Returns:
             Formatted transcript string with clear speaker labels
         """
+        # Fast path for the common shape (dict segments with numeric
+        # timestamps, i.e. Whisper output): the segments collapse into a
+        # hashable row tuple handed to the memoized vectorized formatter,
+        # so repeat formatting of the same transcript is a cache lookup.
+        if segments and all(isinstance(s, dict) for s in segments):
+            timestamps = [s.get('timestamp', s.get('start', 0)) for s in segments]
+            if not any(isinstance(t, str) for t in timestamps):
+                rows = tuple(
+                    (t, seg.get('speaker', 'unknown'), seg.get('text', '').strip())
+                    for t, seg in zip(timestamps, segments)
+                )
+                return _format_segments(rows)
+
         formatted = []
-        
+
         for segment in segments:
             if isinstance(segment, dict):
                 timestamp = segment.get('timestamp', segment.get('start', 0))
                 text = segment.get('text', '').strip()
-                speaker = segment.get('speaker', 'unknown')
-                
-                # Format speaker label clearly
-                if speaker.lower() == 'therapist':
-                    speaker_label = "THERAPIST"
-                elif speaker.lower() == 'client':
-                    speaker_label = "CLIENT"
-                else:
-                    speaker_label = speaker.upper()
-                
+                speaker_label = _speaker_label(segment.get('speaker', 'unknown'))
+
                 # Format timestamp
                 if isinstance(timestamp, str):
                     # ISO format timestamp - just use as is
@@ -137,12 +199,12 @@ class TranscriptionService:
                     minutes = int(timestamp // 60)
                     seconds = int(timestamp % 60)
                     time_str = f"{minutes:02d}:{seconds:02d}"
-                
+
                 formatted.append(f"[{time_str}] {speaker_label}: {text}")
             else:
                 # Handle different segment formats
                 formatted.append(str(segment))
-        
+
         return '\n'.join(formatted)
     
     def combine_transcripts(self, transcripts: List[str]) -> str:
@@ -158,26 +220,32 @@ class TranscriptionService:
         return '\n\n'.join(transcripts)
 
 
+# Static mock segments built once at import; transcribe_audio hands out a
+# fresh list over the same dicts instead of re-allocating them per call.
+# Treat the segment dicts as read-only.
+_MOCK_SEGMENTS = (
+    {'start': 0, 'text': 'Hello, how are you feeling today?'},
+    {'start': 5, 'text': 'I have been feeling anxious lately.'},
+    {'start': 12, 'text': 'Can you tell me more about that?'},
+    {'start': 18, 'text': 'It started when I began my new job...'},
+)
+
+
 class MockTranscriptionService(TranscriptionService):
     """Mock transcription service for testing without API key"""
-    
+
     def __init__(self):
         """Initialize mock service"""
         super().__init__()
         self.client = True  # Mock client
-    
+
     def transcribe_audio(self, audio_file_path: str, language: str = "en") -> Dict:
         """Mock transcription"""
         return {
             'success': True,
             'text': f"[Mock Transcription] This is a simulated transcription of the audio file: {audio_file_path}. "
                    f"In a real implementation, this would contain the actual speech-to-text conversion of the therapy session.",
-            'segments': [
-                {'start': 0, 'text': 'Hello, how are you feeling today?'},
-                {'start': 5, 'text': 'I have been feeling anxious lately.'},
-                {'start': 12, 'text': 'Can you tell me more about that?'},
-                {'start': 18, 'text': 'It started when I began my new job...'}
-            ],
+            'segments': list(_MOCK_SEGMENTS),
             'language': language,
             'duration': 30.0
         }
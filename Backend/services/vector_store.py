@@ -3,12 +3,50 @@ Vector Store Service
 Handles ChromaDB operations for storing and retrieving embeddings
 """
 import chromadb
+import functools
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional
 import google.generativeai as genai
 from groq import Groq
 import os
+import re
+import zlib
 import numpy as np
 
+logger = logging.getLogger(__name__)
+
+# Tokenizer and stopword set for reranking, built once at import
+_WORD_RE = re.compile(r'\b\w+\b')
+_STOPWORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
+    'of', 'with', 'is', 'are', 'was', 'were', 'what', 'how', 'why', 'when',
+    'where'
+})
+
+
+@functools.lru_cache(maxsize=2048)
+def _token_set(text: str) -> frozenset:
+    """Unique lowercase word tokens of a text, memoized
+
+    The same chunks reappear across retrievals (hot documents surface for
+    many queries), so tokenizing each distinct text once saves the regex
+    scan and set build on every rerank after the first.
+    """
+    return frozenset(_WORD_RE.findall(text.lower()))
+
+# Collection metadata: description plus HNSW tuning. Chroma's index is HNSW
+# under the hood; cosine space matches the normalized embeddings, higher
+# construction_ef/M buy recall at index time so search_ef can stay modest
+_COLLECTION_METADATA = {
+    "description": "Therapy practice documents, notes, and client records",
+    "hnsw:space": "cosine",
+    "hnsw:construction_ef": 200,
+    "hnsw:search_ef": 64,
+    "hnsw:M": 32
+}
+
 
 class VectorStore:
     def __init__(self, collection_name: str = "therapy_documents"):
@@ -21,32 +59,40 @@ class VectorStore:
         # Get or create collection
         try:
             self.collection = self.client.get_collection(name=collection_name)
-            print(f"Loaded existing collection: {collection_name}")
+            logger.info("Loaded existing collection: %s", collection_name)
         except:
             self.collection = self.client.create_collection(
                 name=collection_name,
-                metadata={"description": "Therapy practice documents, notes, and client records"}
+                metadata=_COLLECTION_METADATA
             )
-            print(f"Created new collection: {collection_name}")
+            logger.info("Created new collection: %s", collection_name)
         
         # Initialize Gemini for embeddings
         self.gemini_api_key = os.getenv('GEMINI_API_KEY')
         if self.gemini_api_key:
             genai.configure(api_key=self.gemini_api_key)
-            print("Gemini API configured for embeddings")
+            logger.info("Gemini API configured for embeddings")
         
         # Initialize Groq as fallback
         self.groq_api_key = os.getenv('GROQ_API_KEY')
         if self.groq_api_key:
             self.groq_client = Groq(api_key=self.groq_api_key)
-            print("Groq API configured as fallback")
+            logger.info("Groq API configured as fallback")
         else:
             self.groq_client = None
             
         if not self.gemini_api_key and not self.groq_api_key:
-            print("Warning: No API keys found. Embeddings will use dummy values.")
+            logger.warning("No API keys found. Embeddings will use dummy values.")
+
+        # Query embeddings repeat heavily (same questions, re-ranking
+        # sweeps), so memoize them: a hot query becomes a dict lookup
+        # instead of an embedding round-trip. Bound per instance;
+        # cache_info() surfaces hit/miss counts via get_collection_stats.
+        self._cached_query_embedding = functools.lru_cache(maxsize=4096)(
+            self.generate_embedding
+        )
     
-    def generate_embedding_with_groq(self, text: str) -> List[float]:
+    def generate_embedding_with_groq(self, text: str) -> np.ndarray:
         """Generate embedding using Groq's LLM to create a simple hash-based embedding"""
         try:
             if not self.groq_client:
@@ -57,26 +103,34 @@ class VectorStore:
             # We'll create a simple embedding from text characteristics
             
             # Normalize and create a deterministic embedding
-            words = text.lower().split()
+            words = text.lower().split()[:384]  # Use first 384 words
             # Create a 768-dimensional embedding based on text features
-            embedding = [0.0] * 768
-            
-            # Use word characteristics to populate embedding
-            for i, word in enumerate(words[:384]):  # Use first 384 words
-                # Create two values per word based on hash
-                hash_val = hash(word)
-                embedding[i*2] = (hash_val % 1000) / 1000.0
-                embedding[i*2 + 1] = ((hash_val // 1000) % 1000) / 1000.0
-            
+            embedding = np.zeros(768, dtype=np.float32)
+
+            if words:
+                # Two values per word from its hash, filled with strided
+                # assignments — three vectorized passes instead of a
+                # per-word Python loop over the array. crc32 instead of
+                # hash(): Python's hash is salted per process
+                # (PYTHONHASHSEED), which would make these embeddings
+                # unstable across restarts and defeat any embedding cache;
+                # zlib's crc32 is deterministic and C-speed.
+                hashes = np.fromiter(
+                    (zlib.crc32(word.encode('utf-8')) for word in words),
+                    dtype=np.int64, count=len(words)
+                )
+                embedding[0:2 * len(hashes):2] = (hashes % 1000) / 1000.0
+                embedding[1:2 * len(hashes):2] = ((hashes // 1000) % 1000) / 1000.0
+
             # Normalize the embedding
             norm = np.linalg.norm(embedding)
             if norm > 0:
-                embedding = [x / norm for x in embedding]
-            
+                embedding /= norm
+
             return embedding
         except Exception as e:
-            print(f"Error generating Groq embedding: {e}")
-            return [0.0] * 768
+            logger.error("Error generating Groq embedding: %s", e)
+            return np.zeros(768, dtype=np.float32)
     
     def generate_embedding(self, text: str) -> List[float]:
         """Generate embedding for text using Gemini (primary) or Groq (fallback)"""
@@ -92,107 +146,191 @@ class VectorStore:
             except Exception as e:
                 error_msg = str(e)
                 if "429" in error_msg or "quota" in error_msg.lower():
-                    print(f"Gemini quota exceeded, falling back to Groq")
+                    logger.warning("Gemini quota exceeded, falling back to Groq")
                 else:
-                    print(f"Gemini error: {e}, falling back to Groq")
+                    logger.warning("Gemini error: %s, falling back to Groq", e)
         
         # Fallback to Groq
         if self.groq_client:
             return self.generate_embedding_with_groq(text)
         
         # Last resort: dummy embedding
-        print("Warning: Using dummy embedding")
+        logger.warning("Using dummy embedding")
         return [0.0] * 768
-    
+
+    def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embeddings for a batch of texts
+
+        Gemini's embed_content accepts a list of texts, so an ingest pass pays
+        one API round-trip per sub-batch instead of one per chunk. Falls back
+        to the per-text Groq/dummy path when Gemini is unavailable.
+        """
+        if not texts:
+            return []
+
+        if self.gemini_api_key:
+            try:
+                embeddings = []
+                # Gemini caps batch embedding requests at 100 texts
+                for start in range(0, len(texts), 100):
+                    result = genai.embed_content(
+                        model="models/embedding-001",
+                        content=texts[start:start + 100],
+                        task_type="retrieval_document"
+                    )
+                    embeddings.extend(result['embedding'])
+                return embeddings
+            except Exception as e:
+                error_msg = str(e)
+                if "429" in error_msg or "quota" in error_msg.lower():
+                    logger.warning("Gemini quota exceeded, falling back to Groq")
+                else:
+                    logger.warning("Gemini error: %s, falling back to Groq", e)
+
+        # Groq hash embeddings are computed locally, so per-text is fine here
+        if self.groq_client:
+            return [self.generate_embedding_with_groq(text) for text in texts]
+
+        logger.warning("Using dummy embeddings")
+        return [[0.0] * 768 for _ in texts]
+
     def add_documents(self, documents: List[Dict[str, any]]) -> None:
         """
         Add documents to the vector store
-        
+
         Args:
-            documents: List of dicts with 'text' and 'metadata' keys
+            documents: List of Chunk records (or legacy dicts with 'text' and
+                'metadata' keys)
         """
         if not documents:
-            print("No documents to add")
+            logger.debug("No documents to add")
             return
         
-        print(f"Adding {len(documents)} documents to vector store...")
+        logger.info("Adding %d documents to vector store...", len(documents))
         
         # ChromaDB has a max batch size of ~5000, so we'll batch in chunks of 1000
         batch_size = 1000
         total_batches = (len(documents) + batch_size - 1) // batch_size
-        
-        for batch_idx in range(total_batches):
-            start_idx = batch_idx * batch_size
-            end_idx = min((batch_idx + 1) * batch_size, len(documents))
-            batch_docs = documents[start_idx:end_idx]
-            
-            print(f"Processing batch {batch_idx + 1}/{total_batches} ({len(batch_docs)} documents)...")
-            
-            # Prepare data for ChromaDB
-            ids = []
-            embeddings = []
-            metadatas = []
-            documents_text = []
-            
-            for i, doc in enumerate(batch_docs):
-                # Generate unique ID based on type and metadata
-                source = doc['metadata'].get('source', 'unknown')
-                doc_type = doc['metadata'].get('type', 'unknown')
-                chunk_index = doc['metadata'].get('chunk_index', start_idx + i)
-                
-                # Include type-specific IDs for uniqueness
-                if doc_type == 'note':
-                    note_id = doc['metadata'].get('note_id', 'unknown')
-                    doc_id = f"note_{note_id}_{chunk_index}"
-                elif doc_type == 'client':
-                    client_id = doc['metadata'].get('client_id', 'unknown')
-                    doc_id = f"client_{client_id}_{chunk_index}"
-                else:  # pdf or other
-                    doc_id = f"{source}_{chunk_index}_{batch_idx}"
-                    
-                ids.append(doc_id)
-                
-                # Generate embedding
-                embedding = self.generate_embedding(doc['text'])
-                embeddings.append(embedding)
-                
-                # Store metadata and text
-                metadatas.append(doc['metadata'])
-                documents_text.append(doc['text'])
-            
-            # Add batch to collection
+
+        # Pipeline the two stages: embedding is network-bound, the
+        # persistent client's add() is disk-bound, so batch N+1 embeds
+        # while batch N writes on a single background worker. Waiting on
+        # the previous write before submitting the next keeps at most one
+        # batch buffered and preserves write order.
+        write_future = None
+        with ThreadPoolExecutor(max_workers=1) as writer:
+            for batch_idx in range(total_batches):
+                start_idx = batch_idx * batch_size
+                end_idx = min((batch_idx + 1) * batch_size, len(documents))
+                batch_docs = documents[start_idx:end_idx]
+
+                logger.debug("Processing batch %d/%d (%d documents)...", batch_idx + 1, total_batches, len(batch_docs))
+
+                # Prepare data for ChromaDB
+                ids = []
+                metadatas = []
+                documents_text = []
+
+                for doc in batch_docs:
+                    # Accept both legacy dicts and slotted Chunk records
+                    if isinstance(doc, dict):
+                        text, meta = doc['text'], doc['metadata']
+                    else:
+                        text, meta = doc.text, doc.metadata()
+
+                    # Content-addressed ID: a type-specific prefix for
+                    # readability plus a hash of the chunk text, so
+                    # re-ingesting unchanged content maps to the same ID
+                    # instead of minting duplicates
+                    source = meta.get('source', 'unknown')
+                    doc_type = meta.get('type', 'unknown')
+                    content_hash = hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+                    if doc_type == 'note':
+                        doc_id = f"note_{meta.get('note_id', 'unknown')}_{content_hash}"
+                    elif doc_type == 'client':
+                        doc_id = f"client_{meta.get('client_id', 'unknown')}_{content_hash}"
+                    else:  # pdf or other
+                        doc_id = f"{source}_{content_hash}"
+
+                    ids.append(doc_id)
+
+                    # Store metadata and text
+                    metadatas.append(meta)
+                    documents_text.append(text)
+
+                # Skip chunks Chroma already holds: with content-addressed
+                # IDs an existing ID means identical text, so re-runs pay
+                # neither the embedding call nor the write for them
+                try:
+                    existing = set(self.collection.get(ids=ids, include=[])['ids'])
+                except Exception:
+                    existing = set()
+                if existing:
+                    keep = [i for i, doc_id in enumerate(ids) if doc_id not in existing]
+                    logger.debug("Skipping %d already-indexed chunks", len(ids) - len(keep))
+                    ids = [ids[i] for i in keep]
+                    metadatas = [metadatas[i] for i in keep]
+                    documents_text = [documents_text[i] for i in keep]
+                    if not ids:
+                        continue
+
+                # Embed the whole batch at once instead of one text per API
+                # call; hand Chroma a float32 matrix (its native dtype)
+                # rather than per-document Python float lists. This overlaps
+                # with the previous batch's write below.
+                embeddings = np.asarray(self.generate_embeddings(documents_text), dtype=np.float32)
+
+                try:
+                    if write_future is not None:
+                        write_future.result()
+                        logger.debug("Batch %d/%d added successfully", batch_idx, total_batches)
+                    # upsert, not add: identical IDs overwrite in place, so
+                    # re-indexing never raises on duplicates
+                    write_future = writer.submit(
+                        self.collection.upsert,
+                        ids=ids,
+                        embeddings=embeddings,
+                        metadatas=metadatas,
+                        documents=documents_text
+                    )
+                except Exception as e:
+                    logger.error("Error adding batch %d: %s: %s", batch_idx, type(e).__name__, e)
+                    raise
+
+            # Surface errors from the final write
             try:
-                self.collection.add(
-                    ids=ids,
-                    embeddings=embeddings,
-                    metadatas=metadatas,
-                    documents=documents_text
-                )
-                print(f"Batch {batch_idx + 1}/{total_batches} added successfully!")
+                if write_future is not None:
+                    write_future.result()
+                    logger.debug("Batch %d/%d added successfully", total_batches, total_batches)
             except Exception as e:
-                print(f"Error adding batch {batch_idx + 1}: {type(e).__name__}: {e}")
+                logger.error("Error adding batch %d: %s: %s", total_batches, type(e).__name__, e)
                 raise
-        
-        print(f"All {len(documents)} documents added successfully!")
+
+        logger.info("All %d documents added successfully", len(documents))
     
-    def query(self, query_text: str, n_results: int = 5) -> Dict[str, any]:
+    def query(self, query_text: str, n_results: int = 5, query_embedding: Optional[List[float]] = None) -> Dict[str, any]:
         """
         Query the vector store for similar documents
-        
+
         Args:
             query_text: Query string
             n_results: Number of results to return
-        
+            query_embedding: Precomputed embedding for query_text (avoids
+                re-embedding when the caller already has one)
+
         Returns:
             Dictionary with query results
         """
         try:
-            # Generate query embedding
-            query_embedding = self.generate_embedding(query_text)
-            
+            # Generate query embedding (unless the caller supplied one)
+            if query_embedding is None:
+                query_embedding = self._cached_query_embedding(query_text)
+
             # Query collection
             results = self.collection.query(
-                query_embeddings=[query_embedding],
+                query_embeddings=[np.asarray(query_embedding, dtype=np.float32)],
                 n_results=n_results
             )
             
@@ -212,7 +350,7 @@ class VectorStore:
                 "query": query_text
             }
         except Exception as e:
-            print(f"Error querying collection: {e}")
+            logger.error("Error querying collection: %s", e)
             return {
                 "success": False,
                 "results": [],
@@ -224,52 +362,61 @@ class VectorStore:
         Rerank chunks based on relevance using lexical matching + similarity scores
         Combines semantic similarity with keyword matching for better results
         """
-        import re
-        
-        # Extract keywords from query (simple approach)
-        query_lower = query.lower()
-        query_words = set(re.findall(r'\b\w+\b', query_lower))
-        
-        # Remove common stopwords
-        stopwords = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'is', 'are', 'was', 'were', 'what', 'how', 'why', 'when', 'where'}
-        query_words = query_words - stopwords
-        
-        # Score each chunk
-        scored_chunks = []
-        for chunk in chunks:
-            text_lower = chunk['text'].lower()
-            text_words = set(re.findall(r'\b\w+\b', text_lower))
-            
-            # Lexical overlap score (Jaccard similarity)
-            if query_words:
-                overlap = len(query_words & text_words)
-                lexical_score = overlap / len(query_words)
-            else:
-                lexical_score = 0
-            
-            # Combine semantic similarity (from vector search) with lexical score
-            semantic_score = chunk.get('similarity', 0)
-            
-            # Weighted combination: 70% semantic, 30% lexical
-            final_score = (0.7 * semantic_score) + (0.3 * lexical_score)
-            
-            chunk['rerank_score'] = final_score
-            scored_chunks.append(chunk)
-        
-        # Sort by final score
-        sorted_chunks = sorted(scored_chunks, key=lambda x: x.get('rerank_score', 0), reverse=True)
-        
-        print(f"Re-ranking: Top chunk score = {sorted_chunks[0]['rerank_score']:.3f}")
-        return sorted_chunks[:top_k]
+        if not chunks:
+            return []
+
+        # Extract keywords from query (simple approach, minus stopwords)
+        query_words = _token_set(query) - _STOPWORDS
+
+        # Lexical overlap per chunk (Jaccard against the query keywords)
+        if query_words:
+            inv_query_len = 1.0 / len(query_words)
+            lexical = np.fromiter(
+                (len(query_words & _token_set(chunk['text'])) * inv_query_len
+                 for chunk in chunks),
+                dtype=np.float64, count=len(chunks)
+            )
+        else:
+            lexical = np.zeros(len(chunks))
+
+        semantic = np.fromiter(
+            (chunk.get('similarity', 0) for chunk in chunks),
+            dtype=np.float64, count=len(chunks)
+        )
+
+        # Weighted combination: 70% semantic, 30% lexical — one vectorized
+        # pass instead of a per-chunk Python arithmetic loop
+        scores = 0.7 * semantic + 0.3 * lexical
+
+        for chunk, score in zip(chunks, scores):
+            chunk['rerank_score'] = float(score)
+
+        # Top-k by score, descending: argpartition selects the k winners in
+        # O(n), then only those k get sorted
+        if top_k < len(chunks):
+            top_idx = np.argpartition(-scores, top_k)[:top_k]
+        else:
+            top_idx = np.arange(len(chunks))
+        order = top_idx[np.argsort(-scores[top_idx])]
+        top = [chunks[i] for i in order]
+
+        logger.debug("Re-ranking: Top chunk score = %.3f", top[0]['rerank_score'])
+        return top
     
     def get_collection_stats(self) -> Dict[str, any]:
         """Get statistics about the collection"""
         try:
             count = self.collection.count()
+            cache_info = self._cached_query_embedding.cache_info()
             return {
                 "success": True,
                 "collection_name": self.collection_name,
-                "document_count": count
+                "document_count": count,
+                "query_cache": {
+                    "hits": cache_info.hits,
+                    "misses": cache_info.misses,
+                    "size": cache_info.currsize
+                }
             }
         except Exception as e:
             return {
@@ -284,12 +431,19 @@ class VectorStore:
             self.client.delete_collection(name=self.collection_name)
             self.collection = self.client.create_collection(
                 name=self.collection_name,
-                metadata={"description": "Therapy practice documents, notes, and client records"}
+                metadata=_COLLECTION_METADATA
             )
-            print(f"Collection {self.collection_name} cleared")
+            logger.info("Collection %s cleared", self.collection_name)
         except Exception as e:
-            print(f"Error clearing collection: {e}")
+            logger.error("Error clearing collection: %s", e)
     
+    def delete_where(self, where: Dict[str, any]) -> None:
+        """Delete all documents matching a metadata filter"""
+        try:
+            self.collection.delete(where=where)
+        except Exception as e:
+            logger.error("Error deleting documents: %s", e)
+
     def delete_by_source(self, source: str) -> None:
         """Delete all documents from a specific source"""
         try:
@@ -300,6 +454,6 @@ class VectorStore:
             
             if results['ids']:
                 self.collection.delete(ids=results['ids'])
-                print(f"Deleted {len(results['ids'])} documents from source: {source}")
+                logger.info("Deleted %d documents from source: %s", len(results['ids']), source)
         except Exception as e:
-            print(f"Error deleting documents: {e}")
+            logger.error("Error deleting documents: %s", e)
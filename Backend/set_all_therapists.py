@@ -2,14 +2,12 @@
 Set all users as therapists (for therapy assistant app)
 """
 from pymongo import MongoClient
-import os
-from dotenv import load_dotenv
 
-load_dotenv()
+# Loads .env once for the process and exposes the resolved values
+import env_config
 
 # Connect to MongoDB
-mongo_uri = os.getenv('MONGO_URI', 'mongodb://localhost:27017/therapy_assistant')
-client = MongoClient(mongo_uri)
+client = MongoClient(env_config.MONGO_URI)
 db = client.get_database()
 
 users_collection = db['users']
@@ -17,14 +15,17 @@ users_collection = db['users']
 print("🔄 Updating all users to have 'therapist' role...\n")
 
 result = users_collection.update_many(
-    {},  # Match all users
+    {'role': {'$ne': 'therapist'}},  # Skip users that already have the role
     {'$set': {'role': 'therapist'}}
 )
 
 print(f"✅ Updated {result.modified_count} users")
 
 print("\n📋 Current Users:\n")
-users = list(users_collection.find())
+# Project only the printed fields instead of shipping full documents
+users = users_collection.find(
+    {}, {'username': 1, 'full_name': 1, 'role': 1, '_id': 0}
+)
 for user in users:
     print(f"✓ {user.get('username', 'N/A'):20s} - {user.get('full_name', 'N/A'):20s} - Role: {user.get('role', 'N/A')}")
 
@@ -7,9 +7,9 @@ sys.path.insert(0, os.path.dirname(__file__))
 
 from pymongo import MongoClient
 from models.user import User
-from dotenv import load_dotenv
 
-load_dotenv()
+# Loads .env once for the process and exposes the resolved values
+import env_config
 
 def test_database():
     print("=" * 60)
@@ -17,7 +17,7 @@ def test_database():
     print("=" * 60)
     
     # Connect to MongoDB
-    mongo_uri = os.environ.get('MONGO_URI')
+    mongo_uri = env_config.MONGO_URI
     print(f"\n1. Connecting to MongoDB...")
     
     try:
@@ -38,7 +38,12 @@ def test_database():
     print(f"\n2. Checking users collection...")
     user_model = User(db)
     
-    all_users = list(db.users.find())
+    # Only the fields printed below — pulling full user documents just to
+    # show username/email scales badly as the collection grows
+    all_users = list(db.users.find(
+        {},
+        {'username': 1, 'email': 1, 'password_hash': 1, '_id': 0}
+    ).batch_size(500))
     print(f"   Found {len(all_users)} users in database")
     
     if all_users:
@@ -68,7 +73,9 @@ def test_database():
     
     # Test login
     print(f"\n4. Testing login with first user...")
-    first_user = all_users[0] if all_users else db.users.find_one()
+    first_user = all_users[0] if all_users else db.users.find_one(
+        {}, {'username': 1, 'email': 1, 'password_hash': 1, '_id': 0}
+    )
     
     if first_user:
         username = first_user.get('username')
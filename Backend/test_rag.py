@@ -3,51 +3,91 @@ Quick test script to verify RAG Assistant is working
 """
 import os
 import sys
-from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pymongo import MongoClient
+
+# Loads .env once for the process and exposes the resolved values
+import env_config
 from services.rag_assistant import RAGAssistant
 
-# Load environment variables
-load_dotenv()
+# Process-wide client so repeated invocations under a test runner reuse
+# the connection pool instead of re-paying handshake + server discovery.
+_mongo_client = None
+
+def get_client():
+    """Return the shared MongoClient, creating it on first use."""
+    global _mongo_client
+    if _mongo_client is None:
+        # A localhost URI is a single server — skip replica-set discovery
+        # and fail fast instead of burning the full selection timeout
+        local = 'localhost' in env_config.MONGO_URI or '127.0.0.1' in env_config.MONGO_URI
+        _mongo_client = MongoClient(
+            env_config.MONGO_URI,
+            directConnection=local,
+            serverSelectionTimeoutMS=1000 if local else 5000,
+            connectTimeoutMS=1000 if local else 30000,
+            appname='therapy-tests',
+            # Ignored with a warning when the codec libs aren't installed
+            compressors='zstd,snappy',
+        )
+    return _mongo_client
+
+def _check_env():
+    """Check API keys; returns the lines to print."""
+    lines = ["\n1. Checking API Keys..."]
+    gemini_key = env_config.GEMINI_API_KEY
+    groq_key = env_config.GROQ_API_KEY
 
-def test_rag():
-    print("=" * 60)
-    print("Testing RAG Assistant")
-    print("=" * 60)
-    
-    # Check environment variables
-    print("\n1. Checking API Keys...")
-    gemini_key = os.getenv('GEMINI_API_KEY')
-    groq_key = os.getenv('GROQ_API_KEY')
-    
     if gemini_key:
-        print(f"   ✓ GEMINI_API_KEY: Found (length: {len(gemini_key)})")
+        lines.append(f"   ✓ GEMINI_API_KEY: Found (length: {len(gemini_key)})")
     else:
-        print("   ✗ GEMINI_API_KEY: Not found")
-        
+        lines.append("   ✗ GEMINI_API_KEY: Not found")
+
     if groq_key:
-        print(f"   ✓ GROQ_API_KEY: Found (length: {len(groq_key)})")
+        lines.append(f"   ✓ GROQ_API_KEY: Found (length: {len(groq_key)})")
     else:
-        print("   ✗ GROQ_API_KEY: Not found")
-    
-    # Connect to MongoDB
-    print("\n2. Connecting to MongoDB...")
+        lines.append("   ✗ GROQ_API_KEY: Not found")
+    return lines
+
+def _check_mongo():
+    """Connect to MongoDB; returns (lines to print, db handle or None)."""
+    lines = ["\n2. Connecting to MongoDB..."]
     try:
-        mongo_uri = os.getenv('MONGO_URI', 'mongodb://localhost:27017/therapy_assistant')
-        client = MongoClient(mongo_uri, serverSelectionTimeoutMS=5000)
-        db = client.get_database()
+        db = get_client().get_database()
         db.command('ping')
-        print(f"   ✓ MongoDB connected: {mongo_uri}")
-        
+        lines.append(f"   ✓ MongoDB connected: {env_config.MONGO_URI}")
+
         # Check collections
         notes_count = db.notes.count_documents({})
         clients_count = db.clients.count_documents({})
-        print(f"   ✓ Notes in database: {notes_count}")
-        print(f"   ✓ Clients in database: {clients_count}")
+        lines.append(f"   ✓ Notes in database: {notes_count}")
+        lines.append(f"   ✓ Clients in database: {clients_count}")
+        return lines, db
     except Exception as e:
-        print(f"   ✗ MongoDB connection failed: {e}")
-        db = None
-    
+        lines.append(f"   ✗ MongoDB connection failed: {e}")
+        return lines, None
+
+def test_rag():
+    print("=" * 60)
+    print("Testing RAG Assistant")
+    print("=" * 60)
+
+    # The env and MongoDB checks are independent I/O — run them
+    # concurrently so the 5s server-selection timeout overlaps the rest
+    # instead of serialising in front of it. Results are printed in a
+    # fixed order afterward so the output stays deterministic.
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        env_future = pool.submit(_check_env)
+        mongo_future = pool.submit(_check_mongo)
+        for _ in as_completed([env_future, mongo_future]):
+            pass
+
+    for line in env_future.result():
+        print(line)
+    mongo_lines, db = mongo_future.result()
+    for line in mongo_lines:
+        print(line)
+
     # Initialize RAG Assistant
     print("\n3. Initializing RAG Assistant...")
     try:
@@ -58,14 +98,14 @@ def test_rag():
     except Exception as e:
         print(f"   ✗ Failed to initialize RAG: {e}")
         return
-    
+
     # Check vector store
     print("\n4. Checking Vector Store...")
     try:
         collection_stats = rag.vector_store.get_collection_stats()
         print(f"   ✓ Vector store loaded")
         print(f"   ✓ Total documents: {collection_stats.get('total_documents', 0)}")
-        
+
         # Show breakdown by type
         pdfs = collection_stats.get('pdf_documents', 0)
         notes = collection_stats.get('note_documents', 0)
@@ -75,14 +115,14 @@ def test_rag():
         print(f"     - Client documents: {clients}")
     except Exception as e:
         print(f"   ✗ Failed to check vector store: {e}")
-    
+
     # Test a query
     print("\n5. Testing RAG Query...")
     try:
         test_query = "What is cognitive behavioral therapy?"
         print(f"   Query: '{test_query}'")
         result = rag.query_assistant(test_query, n_results=3)
-        
+
         if result.get('success'):
             print(f"   ✓ Query successful!")
             print(f"   ✓ Retrieved {len(result.get('retrieved_chunks', []))} relevant chunks")
@@ -95,7 +135,7 @@ def test_rag():
         print(f"   ✗ Query test failed: {e}")
         import traceback
         traceback.print_exc()
-    
+
     print("\n" + "=" * 60)
     print("RAG Test Complete!")
     print("=" * 60)
@@ -0,0 +1,44 @@
+"""
+Quick test for transcript compression filler stripping
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(__file__))
+
+from services.summary_service import _compress_transcript
+
+
+def test_compression():
+    print("=" * 60)
+    print("TRANSCRIPT COMPRESSION TEST")
+    print("=" * 60)
+
+    # Hyphenated fillers must be stripped whole — 'uh-huh' used to lose
+    # only its 'uh' prefix, leaving '-huh' artifacts in the prompt
+    print("\n1. Hyphenated fillers...")
+    out = _compress_transcript("Therapist: I feel bad.\nClient: uh-huh. Right.")
+    assert out == "Therapist: I feel bad.\nClient: Right.", repr(out)
+    assert '-huh' not in out
+    print("   ✓ 'uh-huh' stripped whole")
+
+    out = _compress_transcript("Client: mm-hmm, mmhmm, I see.")
+    assert '-hmm' not in out and 'mmhmm' not in out, repr(out)
+    print("   ✓ 'mm-hmm' variants stripped")
+
+    print("\n2. Plain fillers...")
+    out = _compress_transcript("Client: Ummm, uh, you know, I froze.")
+    assert out == "Client: I froze.", repr(out)
+    print("   ✓ um/uh/you know stripped")
+
+    print("\n3. Clinical content untouched...")
+    out = _compress_transcript("Client: I don't like how I sort of shut down.")
+    assert out == "Client: I don't like how I sort of shut down.", repr(out)
+    print("   ✓ 'like'/'sort of' preserved")
+
+    print("\n" + "=" * 60)
+    print("ALL CHECKS PASSED")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_compression()
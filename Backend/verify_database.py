@@ -2,13 +2,36 @@
 Verify MongoDB Collections and Data
 """
 from pymongo import MongoClient
-from config import Config
 from datetime import datetime
 
+# Loads .env once for the process and exposes the resolved values
+import env_config
+
+# Process-wide client so repeated invocations under a test runner reuse
+# the connection pool instead of re-paying handshake + server discovery.
+_mongo_client = None
+
+def get_client():
+    """Return the shared MongoClient, creating it on first use."""
+    global _mongo_client
+    if _mongo_client is None:
+        # A localhost URI is a single server — skip replica-set discovery
+        # and fail fast instead of burning the default 30s selection timeout
+        local = 'localhost' in env_config.MONGO_URI or '127.0.0.1' in env_config.MONGO_URI
+        _mongo_client = MongoClient(
+            env_config.MONGO_URI,
+            directConnection=local,
+            serverSelectionTimeoutMS=1000 if local else 30000,
+            connectTimeoutMS=1000 if local else 30000,
+            appname='therapy-tests',
+            # Ignored with a warning when the codec libs aren't installed
+            compressors='zstd,snappy',
+        )
+    return _mongo_client
+
 def verify_collections():
     """Verify all collections and their data"""
-    client = MongoClient(Config.MONGO_URI)
-    db = client['therapy_assistant']
+    db = get_client()['therapy_assistant']
     
     print("=" * 70)
     print("MongoDB Collections Verification")
@@ -20,8 +43,9 @@ def verify_collections():
     
     print("-" * 70)
     
-    # Check Users collection
-    users_count = db.users.count_documents({})
+    # Check Users collection (estimated_document_count reads collection
+    # metadata instead of scanning — the fast path for unfiltered totals)
+    users_count = db.users.estimated_document_count()
     print(f"\n👤 USERS Collection:")
     print(f"   Total documents: {users_count}")
     if users_count > 0:
@@ -30,7 +54,7 @@ def verify_collections():
         print(f"   Fields: email, password, full_name, username, role, created_at, updated_at")
     
     # Check Clients collection
-    clients_count = db.clients.count_documents({})
+    clients_count = db.clients.estimated_document_count()
     print(f"\n👥 CLIENTS Collection:")
     print(f"   Total documents: {clients_count}")
     if clients_count > 0:
@@ -39,20 +63,27 @@ def verify_collections():
         print(f"   Fields: name, email, phone, therapist_id, diagnosis, status, created_at, updated_at")
     
     # Check Sessions collection
-    sessions_count = db.sessions.count_documents({})
+    sessions_count = db.sessions.estimated_document_count()
     print(f"\n📅 SESSIONS Collection:")
     print(f"   Total documents: {sessions_count}")
     if sessions_count > 0:
         sample_session = db.sessions.find_one()
         print(f"   Sample Session ID: {sample_session.get('_id')}")
         print(f"   Status breakdown:")
+        # One $group computes every status count server-side in a single
+        # round-trip instead of one count_documents per status
+        status_counts = {
+            row['_id']: row['n']
+            for row in db.sessions.aggregate([
+                {'$group': {'_id': '$status', 'n': {'$sum': 1}}}
+            ])
+        }
         for status in ['scheduled', 'completed', 'cancelled']:
-            count = db.sessions.count_documents({'status': status})
-            print(f"      - {status}: {count}")
+            print(f"      - {status}: {status_counts.get(status, 0)}")
         print(f"   Fields: therapist_id, client_id, start_time, end_time, status, duration, notes")
     
     # Check Notes collection
-    notes_count = db.notes.count_documents({})
+    notes_count = db.notes.estimated_document_count()
     print(f"\n📝 NOTES Collection:")
     print(f"   Total documents: {notes_count}")
     if notes_count > 0:
@@ -61,16 +92,21 @@ def verify_collections():
         print(f"   Fields: session_id, therapist_id, client_id, content, created_at, updated_at")
     
     # Check AI Insights collection
-    insights_count = db.ai_insights.count_documents({})
+    insights_count = db.ai_insights.estimated_document_count()
     print(f"\n🤖 AI_INSIGHTS Collection:")
     print(f"   Total documents: {insights_count}")
     if insights_count > 0:
         sample_insight = db.ai_insights.find_one()
         print(f"   Sample Insight ID: {sample_insight.get('_id')}")
         print(f"   Insight Types:")
+        type_counts = {
+            row['_id']: row['n']
+            for row in db.ai_insights.aggregate([
+                {'$group': {'_id': '$insight_type', 'n': {'$sum': 1}}}
+            ])
+        }
         for insight_type in ['emotional_state', 'progress_indicator', 'risk_assessment']:
-            count = db.ai_insights.count_documents({'insight_type': insight_type})
-            print(f"      - {insight_type}: {count}")
+            print(f"      - {insight_type}: {type_counts.get(insight_type, 0)}")
         print(f"   Fields: session_id, therapist_id, client_id, insight_type, content, confidence, created_at")
     
     print("\n" + "=" * 70)
@@ -87,8 +123,6 @@ def verify_collections():
     print("\n🔐 Test Login Credentials:")
     print("   Email: therapist@example.com")
     print("   Password: password123")
-    
-    client.close()
 
 if __name__ == "__main__":
     verify_collections()